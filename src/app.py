@@ -1,12 +1,17 @@
+import os
 import streamlit as st
 import pandas as pd
 import time
 from typing import Optional, Dict
 
-from main import process_profile
+from main import empty_result, process_found_url, process_profile
+from captcha_queue import CaptchaDetected
 from chrome_setup import setup_chrome_driver
-from proxy_helper import WebshareProxyManager, ProxyscrapeJSONManager
-from search_engines import get_search_engine
+from registry import names, resolve
+from profile_cache import ChromeProfileCache
+from results_db import ResultsDatabase
+from authwall import AuthwallEstimator, install_authwall_guard
+from url_utils import ROUTE_LINKEDIN, classify_inputs, linkedin_profile_url
 
 
 class LinkedInParserApp:
@@ -24,6 +29,11 @@ class LinkedInParserApp:
             st.session_state.driver = None
         if "metrics_container" not in st.session_state:
             st.session_state.metrics_container = None
+        if "profile_cache" not in st.session_state:
+            profile_cache_dir = os.environ.get("PROFILE_CACHE_DIR")
+            st.session_state.profile_cache = (
+                ChromeProfileCache(profile_cache_dir) if profile_cache_dir else None
+            )
 
     def create_sidebar(self) -> Dict:
         """Create sidebar with settings."""
@@ -31,12 +41,12 @@ class LinkedInParserApp:
             st.header("Settings")
             search_engine = st.selectbox(
                 "Search engine",
-                ["google", "bing", "duckduckgo"],
+                names("engine"),
                 help="Select search engine for profile search",
             )
             proxy_type = st.selectbox(
                 "Proxy type",
-                ["none", "webshare", "proxyscrape"],
+                ["none"] + names("proxy"),
                 help="Select proxy type",
             )
             proxy_api_key = None
@@ -58,12 +68,18 @@ class LinkedInParserApp:
                 value=5,
                 help="Set delay between requests",
             )
+            results_db = st.text_input(
+                "Results database",
+                value=os.environ.get("RESULTS_DB", ""),
+                help="Optional SQLite file to upsert results into",
+            )
             return {
                 "search_engine": search_engine,
                 "proxy_type": proxy_type,
                 "proxy_api_key": proxy_api_key,
                 "headless": headless,
                 "delay": delay,
+                "results_db": results_db,
             }
 
     def update_proxy_info(self) -> None:
@@ -90,14 +106,28 @@ class LinkedInParserApp:
             with col3:
                 st.metric("Last change", proxy_info["last_change"])
 
-    def setup_proxy(self, proxy_type: str, api_key: str) -> Optional[Dict]:
-        """Setup proxy manager with immediate state update"""
-        proxy = None
+    def setup_proxy(
+        self,
+        proxy_type: str,
+        api_key: str,
+        previous: Optional[Dict] = None,
+        cooldown: float = 0,
+    ) -> Optional[Dict]:
+        """
+        Setup proxy manager with immediate state update.
+        The previous proxy is put on cooldown first, so it isn't picked again.
+        """
+        proxy_manager = None
         if proxy_type == "webshare" and api_key:
-            proxy_manager = WebshareProxyManager(api_key=api_key)
-            proxy = proxy_manager.get_current_proxy()
+            proxy_manager = resolve("proxy", "webshare")(api_key=api_key)
         elif proxy_type == "proxyscrape" and api_key:
-            proxy_manager = ProxyscrapeJSONManager(api_url=api_key)
+            proxy_manager = resolve("proxy", "proxyscrape")(api_url=api_key)
+
+        proxy = None
+        if proxy_manager is not None:
+            # Cooldowns are shared by all managers of the same proxy list
+            if cooldown:
+                proxy_manager.cooldown(previous, cooldown)
             proxy = proxy_manager.get_current_proxy()
 
         if proxy:
@@ -112,6 +142,25 @@ class LinkedInParserApp:
 
         return proxy
 
+    def start_driver(self, proxy: Optional[Dict], headless: bool) -> None:
+        """Start a driver, reusing the persistent profile of the proxy"""
+        profile_cache = st.session_state.profile_cache
+        user_data_dir = profile_cache.acquire(proxy) if profile_cache else None
+        st.session_state.driver = setup_chrome_driver(
+            proxy=proxy, headless=headless, user_data_dir=user_data_dir
+        )
+        install_authwall_guard(st.session_state.driver)
+
+    def quit_driver(self) -> None:
+        """Quit the current driver and release its profile"""
+        driver = st.session_state.driver
+        st.session_state.driver = None
+        driver.quit()
+        if st.session_state.profile_cache is not None:
+            st.session_state.profile_cache.release(
+                getattr(driver, "profile_dir", None)
+            )
+
     def process_file(self, file, settings) -> None:
         """Process uploaded file."""
         if file is None:
@@ -122,53 +171,82 @@ class LinkedInParserApp:
             st.error("CSV file must contain 'prooflink' column!")
             return
 
-        profiles = df["prooflink"].dropna().tolist()
+        profiles = df["prooflink"].dropna().astype(str).tolist()
         total_profiles = len(profiles)
 
         if total_profiles == 0:
             st.warning("No profiles found for processing!")
             return
+        routes = classify_inputs(profiles)
 
         progress_bar = st.progress(0)
         status_text = st.empty()
         results_container = st.empty()
 
         proxy = self.setup_proxy(settings["proxy_type"], settings["proxy_api_key"])
-        search_engine = get_search_engine(settings["search_engine"])
-        authwall_count = 0
+        search_engine = resolve("engine", settings["search_engine"], default="google")()
+        authwalls = AuthwallEstimator()
+        authwall_cooldown = float(os.environ.get("AUTHWALL_COOLDOWN", "900"))
+        captcha_cooldown = float(os.environ.get("CAPTCHA_COOLDOWN", "300"))
+        results_db = None
+        if settings["results_db"]:
+            results_db = ResultsDatabase(settings["results_db"])
 
         try:
             if st.session_state.driver is None:
-                st.session_state.driver = setup_chrome_driver(
-                    proxy=proxy, headless=settings["headless"]
-                )
+                self.start_driver(proxy, settings["headless"])
 
             for i, profile_url in enumerate(profiles, 1):
                 status_text.text(
                     f"Processing profile {i}/{total_profiles}: {profile_url}"
                 )
 
-                result = process_profile(
-                    st.session_state.driver, profile_url, search_engine
-                )
-
-                if result.get("IPChange") == "authwall":
-                    authwall_count += 1
-                    if authwall_count >= 5:
-                        proxy = self.setup_proxy(
-                            settings["proxy_type"], settings["proxy_api_key"]
+                captcha = False
+                try:
+                    if routes[i - 1] == ROUTE_LINKEDIN:
+                        # Already a profile URL: no search needed
+                        result = process_found_url(
+                            st.session_state.driver,
+                            profile_url,
+                            linkedin_profile_url(profile_url),
                         )
-                        if proxy:
-                            st.session_state.driver.quit()
-                            st.session_state.driver = setup_chrome_driver(
-                                proxy=proxy, headless=settings["headless"]
-                            )
+                    else:
+                        result = process_profile(
+                            st.session_state.driver, profile_url, search_engine
+                        )
+                except CaptchaDetected as challenge:
+                    # Don't wait for a human: skip the profile, change the proxy
+                    st.warning(f"{challenge}, rotating proxy")
+                    result = empty_result(profile_url, "captcha")
+                    captcha = True
+
+                authwall = result.get("IPChange") == "authwall"
+                if result.get("LinkedInURL"):
+                    authwalls.record(proxy, authwall)
+                # Rotate after a captcha, or once the authwalls show the
+                # proxy is burned (only an authwall can make it burned)
+                cooldown = 0.0
+                if captcha:
+                    cooldown = captcha_cooldown
+                elif authwall and authwalls.is_burned(proxy):
+                    cooldown = authwall_cooldown
+                if cooldown:
+                    authwalls.reset(proxy)
+                    proxy = self.setup_proxy(
+                        settings["proxy_type"],
+                        settings["proxy_api_key"],
+                        previous=proxy,
+                        cooldown=cooldown,
+                    )
+                    if proxy:
+                        self.quit_driver()
+                        self.start_driver(proxy, settings["headless"])
+                        if not captcha:
                             result["IPChange"] = "rotation"
-                            authwall_count = 0
-                else:
-                    authwall_count = 0
 
                 st.session_state.results.append(result)
+                if results_db is not None:
+                    results_db.upsert(result)
 
                 results_df = pd.DataFrame(st.session_state.results)
                 results_container.dataframe(results_df)
@@ -183,9 +261,10 @@ class LinkedInParserApp:
             st.error(f"Error during parsing: {str(e)}")
 
         finally:
+            if results_db is not None:
+                results_db.close()
             if st.session_state.driver:
-                st.session_state.driver.quit()
-                st.session_state.driver = None
+                self.quit_driver()
 
     def run(self) -> None:
         """Main method to run the application"""
@@ -0,0 +1,103 @@
+# authwall.py
+import math
+import time
+from typing import Dict, List, Optional
+
+# Served instead of the authwall page: the URL still shows the redirect,
+# but none of the page (scripts, images, fonts) is downloaded or rendered.
+STUB_PAGE = b"<html><head><title>authwall</title></head><body></body></html>"
+
+
+def is_authwall_url(url: str) -> bool:
+    return "authwall" in (url or "").lower()
+
+
+def install_authwall_guard(driver) -> bool:
+    """
+    Short-circuits the redirect of a profile to the authwall: the document
+    request is answered locally with STUB_PAGE, so the authwall is detected
+    from current_url as soon as driver.get returns.
+    Works with selenium-wire drivers (request interceptor) and cdp_browser
+    tabs; returns False for other drivers.
+    """
+    stub_documents = getattr(driver, "stub_documents", None)
+    if stub_documents is not None:
+        stub_documents("authwall")
+        return True
+    if not hasattr(driver, "request_interceptor"):
+        return False
+
+    def interceptor(request):
+        if request.headers.get("Sec-Fetch-Dest") == "document" and is_authwall_url(
+            request.url
+        ):
+            request.create_response(
+                status_code=200,
+                headers={"Content-Type": "text/html"},
+                body=STUB_PAGE,
+            )
+
+    driver.request_interceptor = interceptor
+    return True
+
+
+class AuthwallEstimator:
+    """
+    Decides per proxy when it is burned, from the outcomes of its profile
+    loads. A CUSUM sequential test compares a healthy authwall rate with a
+    burned one: every authwall adds log(burned / healthy) to the proxy's
+    score, every successful load adds log((1 - burned) / (1 - healthy)),
+    and the score never drops below zero, so a long good history doesn't
+    delay the detection once the proxy is flagged. The proxy is burned when
+    the score passes log((1 - alpha) / alpha); with the defaults that is 2
+    authwalls in a row, or 3 within 5 loads. A proxy idle for max_age seconds
+    starts over. rate() is a rolling (exponentially weighted) authwall rate
+    for the logs.
+    """
+
+    def __init__(
+        self,
+        healthy_rate: float = 0.1,
+        burned_rate: float = 0.7,
+        alpha: float = 0.05,
+        max_age: float = 1800.0,
+        smoothing: float = 0.2,
+    ):
+        self.hit = math.log(burned_rate / healthy_rate)
+        self.miss = math.log((1 - burned_rate) / (1 - healthy_rate))
+        self.limit = math.log((1 - alpha) / alpha)
+        self.max_age = max_age
+        self.smoothing = smoothing
+        # proxy -> [score, rolling rate, last load time]
+        self.state: Dict[str, List[float]] = {}
+
+    @staticmethod
+    def _key(proxy: Optional[Dict]) -> str:
+        return f"{proxy['proxy_address']}:{proxy['port']}" if proxy else "direct"
+
+    def _state(self, proxy: Optional[Dict], now: float) -> List[float]:
+        state = self.state.get(self._key(proxy))
+        if state is None or now - state[2] > self.max_age:
+            state = self.state[self._key(proxy)] = [0.0, 0.0, now]
+        return state
+
+    def record(
+        self, proxy: Optional[Dict], authwall: bool, now: Optional[float] = None
+    ) -> None:
+        now = time.time() if now is None else now
+        state = self._state(proxy, now)
+        state[0] = max(0.0, state[0] + (self.hit if authwall else self.miss))
+        state[1] += self.smoothing * (authwall - state[1])
+        state[2] = now
+
+    def rate(self, proxy: Optional[Dict], now: Optional[float] = None) -> float:
+        now = time.time() if now is None else now
+        return self._state(proxy, now)[1]
+
+    def is_burned(self, proxy: Optional[Dict], now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        return self._state(proxy, now)[0] > self.limit
+
+    def reset(self, proxy: Optional[Dict]) -> None:
+        """Forgets a proxy rotated away from (it comes back after its cooldown)."""
+        self.state.pop(self._key(proxy), None)
@@ -0,0 +1,193 @@
+# bandwidth.py
+import json
+import os
+import threading
+import time
+import urllib.parse
+from typing import Any, Dict, List, Optional, Tuple
+
+# IPChange values that aren't an outcome of their own
+OUTCOMES = {"": "success", "ok": "success", "rotation": "authwall"}
+# Traffic of these outcomes is not waste (batched SERPs serve many profiles)
+USEFUL_OUTCOMES = ("success", "batched")
+
+
+def _headers_size(headers) -> int:
+    if not headers:
+        return 0
+    return sum(len(name) + len(value) + 4 for name, value in headers.items())
+
+
+def drain_traffic(driver) -> List[Tuple[str, int, int]]:
+    """
+    (url, bytes sent, bytes received) of every request the driver made since
+    the last call. selenium-wire drivers record requests themselves and are
+    cleared here (which also bounds their memory); drivers with pop_traffic()
+    (cdp_browser) report their own counts. Other drivers report nothing.
+    """
+    pop_traffic = getattr(driver, "pop_traffic", None)
+    if pop_traffic is not None:
+        return pop_traffic()
+    try:
+        requests = driver.requests
+    except AttributeError:
+        return []
+
+    traffic = []
+    for request in requests:
+        sent = (
+            len(request.method)
+            + len(request.url)
+            + _headers_size(request.headers)
+            + len(request.body or b"")
+        )
+        received = 0
+        if request.response is not None:
+            # body as received on the wire, before content decoding
+            received = _headers_size(request.response.headers) + len(
+                request.response.body or b""
+            )
+        traffic.append((request.url, sent, received))
+    del driver.requests
+    return traffic
+
+
+class BandwidthAccountant:
+    """
+    Requests and bytes of browser traffic, aggregated by proxy, target domain,
+    pipeline stage (search/profile) and outcome (success, authwall, captcha...).
+    Traffic is collected after each stage and stays pending until the outcome
+    of the profile is known (settle). The report gives the cost per
+    successful profile and the biggest waste, and is exported as JSON every
+    export_interval seconds and at the end of the run.
+    """
+
+    def __init__(
+        self,
+        price_per_gb: float = 0.0,
+        export_path: Optional[str] = None,
+        export_interval: float = 300.0,
+    ):
+        self.price_per_gb = price_per_gb
+        self.export_path = export_path
+        self.export_interval = export_interval
+        self.lock = threading.Lock()
+        # (proxy, domain, stage, outcome) -> [requests, bytes sent, bytes received]
+        self.totals: Dict[Tuple[str, str, str, str], List[int]] = {}
+        self.pending: List[Tuple[str, str, str, int, int]] = []
+        self.attempts: Dict[str, int] = {}
+        self.proxies: Dict[int, str] = {}
+        self.last_export = time.time()
+
+    def bind(self, driver, proxy: Optional[Dict]) -> None:
+        """Remembers which proxy a driver goes through."""
+        label = f"{proxy['proxy_address']}:{proxy['port']}" if proxy else "direct"
+        with self.lock:
+            self.proxies[id(driver)] = label
+
+    def unbind(self, driver) -> None:
+        with self.lock:
+            self.proxies.pop(id(driver), None)
+
+    def collect(self, driver, stage: str) -> None:
+        """Drains the driver's traffic into the pending profile."""
+        traffic = drain_traffic(driver)
+        with self.lock:
+            proxy = self.proxies.get(id(driver), "direct")
+            for url, sent, received in traffic:
+                domain = urllib.parse.urlsplit(url).hostname or "unknown"
+                self.pending.append((proxy, domain, stage, sent, received))
+
+    def settle(self, outcome: str, attempt: bool = True) -> None:
+        """
+        Books the pending traffic under the outcome of the profile attempt.
+        attempt=False books traffic that isn't one profile's (batched SERPs).
+        """
+        outcome = OUTCOMES.get(outcome, outcome)
+        with self.lock:
+            for proxy, domain, stage, sent, received in self.pending:
+                total = self.totals.setdefault(
+                    (proxy, domain, stage, outcome), [0, 0, 0]
+                )
+                total[0] += 1
+                total[1] += sent
+                total[2] += received
+            self.pending.clear()
+            if attempt:
+                self.attempts[outcome] = self.attempts.get(outcome, 0) + 1
+        if (
+            self.export_path
+            and time.time() - self.last_export >= self.export_interval
+        ):
+            self.export()
+
+    def _cost(self, nbytes: int) -> float:
+        return nbytes / 1024**3 * self.price_per_gb
+
+    def report(self) -> Dict[str, Any]:
+        with self.lock:
+            totals = dict(self.totals)
+            attempts = dict(self.attempts)
+
+        def group(index: int) -> Dict[str, Dict[str, Any]]:
+            grouped: Dict[str, List[int]] = {}
+            for key, (requests, sent, received) in totals.items():
+                row = grouped.setdefault(key[index], [0, 0])
+                row[0] += requests
+                row[1] += sent + received
+            return {
+                name: {
+                    "requests": requests,
+                    "bytes": nbytes,
+                    "cost": round(self._cost(nbytes), 4),
+                }
+                for name, (requests, nbytes) in sorted(
+                    grouped.items(), key=lambda item: -item[1][1]
+                )
+            }
+
+        total_bytes = sum(sent + received for _, sent, received in totals.values())
+        successes = attempts.get("success", 0)
+        waste = sorted(
+            (
+                (sent + received, key)
+                for key, (_, sent, received) in totals.items()
+                if key[3] not in USEFUL_OUTCOMES
+            ),
+            reverse=True,
+        )
+        return {
+            "requests": sum(requests for requests, _, _ in totals.values()),
+            "bytes": total_bytes,
+            "cost": round(self._cost(total_bytes), 4),
+            "attempts": attempts,
+            "bytes_per_success": total_bytes // successes if successes else None,
+            "cost_per_success": (
+                round(self._cost(total_bytes) / successes, 6) if successes else None
+            ),
+            "by_proxy": group(0),
+            "by_domain": group(1),
+            "by_stage": group(2),
+            "by_outcome": group(3),
+            "top_waste": [
+                {
+                    "proxy": proxy,
+                    "domain": domain,
+                    "stage": stage,
+                    "outcome": outcome,
+                    "bytes": nbytes,
+                }
+                for nbytes, (proxy, domain, stage, outcome) in waste[:10]
+            ],
+        }
+
+    def export(self, path: Optional[str] = None) -> None:
+        path = path or self.export_path
+        if not path:
+            return
+        report = self.report()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        os.replace(tmp_path, path)
+        self.last_export = time.time()
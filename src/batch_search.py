@@ -0,0 +1,131 @@
+# batch_search.py
+import re
+import unicodedata
+import urllib.parse
+from typing import Dict, List, Optional, Set, Tuple
+
+from captcha_queue import CaptchaDetected
+from url_utils import looks_like_url
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def name_tokens(text: str) -> Set[str]:
+    """Lower-case ASCII word tokens (accents removed, 1-letter words dropped)."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = text.encode("ascii", "ignore").decode("ascii").lower()
+    return {token for token in _TOKEN_RE.findall(text) if len(token) > 1}
+
+
+def result_tokens(url: str, title: str) -> Set[str]:
+    """Tokens of a result: its title ("John Smith - Engineer | LinkedIn")
+    and the profile slug ("/in/john-smith-1234")."""
+    path = urllib.parse.unquote(urllib.parse.urlsplit(url).path)
+    slug = path.rstrip("/").rsplit("/", 1)[-1]
+    return name_tokens(title) | name_tokens(slug.replace("-", " "))
+
+
+def match_results(
+    queries: List[str], results: List[Tuple[str, str]]
+) -> Dict[str, str]:
+    """
+    Assigns SERP results to queries: a result matches a query when it
+    contains every token of the query. Every result is used at most once,
+    queries with the most tokens (most specific) pick first.
+    """
+    tokenized = [(url, result_tokens(url, title)) for url, title in results]
+    used: Set[str] = set()
+    matched: Dict[str, str] = {}
+    for query in sorted(queries, key=lambda q: -len(name_tokens(q))):
+        tokens = name_tokens(query)
+        if not tokens:
+            continue
+        for url, candidate in tokenized:
+            if url not in used and tokens <= candidate:
+                matched[query] = url
+                used.add(url)
+                break
+    return matched
+
+
+class BatchSearcher:
+    """
+    Looks up several names with one OR-joined SERP query
+    ("a" OR "b" OR "c") site:linkedin.com/in/, matches the results back to
+    the names and falls back to single queries for the unmatched ones
+    and for inputs that are URLs rather than names.
+    A captcha stops the lookup (every further query would go through the
+    flagged proxy): the queries left unresolved are kept in self.captchas,
+    mapped to the challenge, for the caller to park.
+    """
+
+    def __init__(self, search_engine, batch_size: int = 5):
+        self.search_engine = search_engine
+        self.batch_size = batch_size
+        self.stats = {
+            "queries": 0,
+            "serp_loads": 0,
+            "batch_matched": 0,
+            "fallbacks": 0,
+        }
+        self.captchas: Dict[str, CaptchaDetected] = {}
+
+    def _single(self, driver, query: str) -> Optional[str]:
+        self.stats["fallbacks"] += 1
+        self.stats["serp_loads"] += 1
+        return self.search_engine.search_linkedin_profile(driver, query)
+
+    def lookup(self, driver, queries: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Returns {query: LinkedIn URL or None} for every query.
+        After a captcha the unresolved queries map to None and are listed
+        in self.captchas.
+        """
+        self.stats["queries"] += len(queries)
+        found: Dict[str, Optional[str]] = {}
+        try:
+            self._lookup(driver, queries, found)
+        except CaptchaDetected as challenge:
+            for query in queries:
+                if query not in found:
+                    self.captchas[query] = challenge
+                    found[query] = None
+        return found
+
+    def _lookup(
+        self, driver, queries: List[str], found: Dict[str, Optional[str]]
+    ) -> None:
+        names = [q for q in queries if name_tokens(q) and not looks_like_url(q)]
+
+        if self.search_engine.supports_batch and len(names) > 1:
+            for i in range(0, len(names), self.batch_size):
+                chunk = names[i : i + self.batch_size]
+                if len(chunk) < 2:
+                    continue
+                self.stats["serp_loads"] += 1
+                try:
+                    results = self.search_engine.batch_search_linkedin_results(
+                        driver, chunk
+                    )
+                except CaptchaDetected:
+                    raise
+                except Exception as e:
+                    print(f"Error during batch search: {e}")
+                    results = None
+                if results:
+                    matched = match_results(chunk, results)
+                    self.stats["batch_matched"] += len(matched)
+                    found.update(matched)
+
+        for query in queries:
+            if query not in found:
+                found[query] = self._single(driver, query)
+
+    def report(self) -> Dict[str, float]:
+        """Stats with the batch hit rate and SERP loads saved."""
+        stats = dict(self.stats)
+        stats["batch_hit_rate"] = (
+            stats["batch_matched"] / stats["queries"] if stats["queries"] else 0.0
+        )
+        stats["loads_saved"] = stats["queries"] - stats["serp_loads"]
+        return stats
@@ -0,0 +1,78 @@
+# bench_startup.py
+"""
+Startup-time benchmark: measures how long `import main` takes in a fresh
+interpreter and fails (exit code 1) when it exceeds the budget or when a
+heavy dependency is imported at module load.
+
+    python bench_startup.py [--budget-ms 150] [--runs 5] [--module main]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Must never be loaded by just importing the entry points
+HEAVY_MODULES = [
+    "pandas",
+    "gspread",
+    "oauth2client",
+    "requests",
+    "selenium.webdriver",
+    "seleniumwire",
+    "webdriver_manager",
+]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "modules": sorted(sys.modules)}}))
+"""
+
+
+def measure(module: str) -> dict:
+    """Imports the module in a fresh interpreter, returns time and modules."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module)],
+        cwd=here,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=float(os.environ.get("STARTUP_BUDGET_MS", "150")),
+    )
+    arg_parser.add_argument("--runs", type=int, default=5)
+    arg_parser.add_argument("--module", default="main")
+    args = arg_parser.parse_args()
+
+    samples = [measure(args.module) for _ in range(args.runs)]
+    best = min(s["ms"] for s in samples)
+    loaded = set(samples[0]["modules"])
+    heavy = [m for m in HEAVY_MODULES if m in loaded]
+
+    print(f"import {args.module}: best {best:.1f} ms of {args.runs} run(s)")
+    ok = True
+    if best > args.budget_ms:
+        print(f"FAIL: over the {args.budget_ms:.0f} ms budget")
+        ok = False
+    if heavy:
+        print(f"FAIL: heavy modules imported at startup: {', '.join(heavy)}")
+        ok = False
+    if ok:
+        print("OK")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+# browser.py
+from typing import Any, Dict, List, Optional, Protocol, runtime_checkable
+
+# Locator strategies, same values as selenium's By constants
+BY_ID = "id"
+BY_NAME = "name"
+BY_CSS_SELECTOR = "css selector"
+BY_XPATH = "xpath"
+
+# Key codes understood by send_keys, same values as selenium's Keys
+KEY_RETURN = "\ue006"
+KEY_ENTER = "\ue007"
+
+
+@runtime_checkable
+class BrowserElement(Protocol):
+    """Element of a page, the part of WebElement used by the scraper."""
+
+    @property
+    def text(self) -> str:
+        ...
+
+    def get_attribute(self, name: str) -> Optional[str]:
+        ...
+
+    def click(self) -> None:
+        ...
+
+    def clear(self) -> None:
+        ...
+
+    def send_keys(self, *value: str) -> None:
+        ...
+
+
+@runtime_checkable
+class BrowserHandle(Protocol):
+    """
+    One browser tab as seen by search_engines, parser_logic and
+    selector_registry. Implementations:
+    - selenium WebDriver (setup_chrome_driver), used as is,
+    - browser_contexts.ContextDriver, a tab in a shared Chrome,
+    - cdp_browser.CdpTab, a tab driven over the DevTools websocket,
+    - static_page.StaticPage, saved HTML (offline re-extraction).
+    Lookups take selenium-style (by, value) locators and raise
+    selenium's NoSuchElementException when nothing matches.
+    """
+
+    profile_dir: Optional[str]
+
+    def get(self, url: str) -> None:
+        ...
+
+    @property
+    def current_url(self) -> str:
+        ...
+
+    @property
+    def page_source(self) -> str:
+        ...
+
+    def find_element(self, by: str, value: str) -> BrowserElement:
+        ...
+
+    def find_elements(self, by: str, value: str) -> List[BrowserElement]:
+        ...
+
+    def execute_script(self, script: str, *args) -> Any:
+        ...
+
+    def execute_cdp_cmd(self, cmd: str, cmd_args: Dict) -> Dict:
+        ...
+
+    def quit(self) -> None:
+        ...
@@ -0,0 +1,174 @@
+# browser_contexts.py
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from chrome_setup import MASKING_SCRIPT
+
+
+class _ContextElement:
+    """WebElement of a context tab: activates the tab before every call."""
+
+    def __init__(self, handle: "ContextDriver", element):
+        self._handle = handle
+        self._element = element
+
+    def __getattr__(self, name):
+        with self._handle._active():
+            value = getattr(self._element, name)
+        if not callable(value):
+            return value
+
+        def call(*args, **kwargs):
+            with self._handle._active():
+                return value(*args, **kwargs)
+
+        return call
+
+
+class ContextDriver:
+    """
+    Driver-like handle for one tab in its own browser context
+    (separate cookies, cache and proxy). Implements the part of the
+    WebDriver API used by search_engines and parser_logic.
+    All handles of a pool share one WebDriver session, so commands are
+    serialized; every command first switches to this handle's tab.
+    """
+
+    profile_dir = None
+
+    def __init__(self, pool: "BrowserContextPool", context_id: str, target_id: str):
+        self.pool = pool
+        self.context_id = context_id
+        self.target_id = target_id
+
+    def _active(self):
+        return self.pool._activate(self.target_id)
+
+    def get(self, url: str) -> None:
+        with self._active():
+            self.pool.driver.get(url)
+
+    @property
+    def current_url(self) -> str:
+        with self._active():
+            return self.pool.driver.current_url
+
+    @property
+    def page_source(self) -> str:
+        with self._active():
+            return self.pool.driver.page_source
+
+    @property
+    def title(self) -> str:
+        with self._active():
+            return self.pool.driver.title
+
+    def find_element(self, by, value):
+        with self._active():
+            return _ContextElement(self, self.pool.driver.find_element(by, value))
+
+    def find_elements(self, by, value) -> List[_ContextElement]:
+        with self._active():
+            return [
+                _ContextElement(self, el)
+                for el in self.pool.driver.find_elements(by, value)
+            ]
+
+    def execute_script(self, script: str, *args):
+        with self._active():
+            return self.pool.driver.execute_script(script, *args)
+
+    def execute_cdp_cmd(self, cmd: str, cmd_args: Dict):
+        with self._active():
+            return self.pool.driver.execute_cdp_cmd(cmd, cmd_args)
+
+    def quit(self) -> None:
+        """Closes the tab and disposes its browser context."""
+        self.pool.dispose(self)
+
+
+class BrowserContextPool:
+    """
+    Hosts many isolated sessions in one Chrome process using CDP browser
+    contexts (Target.createBrowserContext). Each context has its own cookie
+    jar and proxy server and costs a tab instead of a whole browser.
+    Per-context proxies can't send credentials: use proxies authorized by
+    IP (the host driver must be started without selenium-wire); with
+    ip_auth=True the credentials of proxy entries are dropped.
+    Handles give isolation, not parallelism: all of them share the host's
+    WebDriver session and the pool lock is held for the whole command, so
+    their navigations run one at a time (see cdp_browser for concurrent tabs).
+    """
+
+    def __init__(self, driver, ip_auth: bool = False):
+        self.driver = driver
+        self.ip_auth = ip_auth
+        self.lock = threading.RLock()
+        self.active_target: Optional[str] = None
+        self.handles: List[ContextDriver] = []
+        self.anchor = driver.current_window_handle
+
+    @contextmanager
+    def _activate(self, target_id: str):
+        """Holds the pool lock with the target's tab switched to."""
+        with self.lock:
+            if self.active_target != target_id:
+                self.driver.switch_to.window(target_id)
+                self.active_target = target_id
+            yield
+
+    def new_context(self, proxy: Optional[Dict] = None) -> ContextDriver:
+        params = {"disposeOnDetach": False}
+        if proxy:
+            if not self.ip_auth and (proxy.get("username") or proxy.get("password")):
+                raise ValueError(
+                    "Browser contexts can't authenticate to a proxy; "
+                    "authorize this machine's IP at the proxy provider and set "
+                    "ip_auth (PROXY_IP_AUTH=1) instead."
+                )
+            params["proxyServer"] = f"http://{proxy['proxy_address']}:{proxy['port']}"
+            print(
+                f"New browser context with proxy {proxy['proxy_address']}:"
+                f"{proxy['port']} (Country: {proxy.get('country_code')})"
+            )
+
+        with self.lock:
+            context_id = self.driver.execute_cdp_cmd(
+                "Target.createBrowserContext", params
+            )["browserContextId"]
+            target_id = self.driver.execute_cdp_cmd(
+                "Target.createTarget",
+                {"url": "about:blank", "browserContextId": context_id},
+            )["targetId"]
+            handle = ContextDriver(self, context_id, target_id)
+            self.handles.append(handle)
+
+        # Same masking as setup_chrome_driver, for the new tab
+        handle.execute_cdp_cmd(
+            "Page.addScriptToEvaluateOnNewDocument", {"source": MASKING_SCRIPT}
+        )
+        return handle
+
+    def dispose(self, handle: ContextDriver) -> None:
+        with self.lock:
+            try:
+                self.driver.execute_cdp_cmd(
+                    "Target.closeTarget", {"targetId": handle.target_id}
+                )
+                self.driver.execute_cdp_cmd(
+                    "Target.disposeBrowserContext",
+                    {"browserContextId": handle.context_id},
+                )
+            except Exception as e:
+                print("Error disposing browser context:", e)
+            if handle in self.handles:
+                self.handles.remove(handle)
+            self.driver.switch_to.window(self.anchor)
+            self.active_target = self.anchor
+
+    def close(self) -> None:
+        """Disposes every context and quits the host browser."""
+        for handle in list(self.handles):
+            self.dispose(handle)
+        self.driver.quit()
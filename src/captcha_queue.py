@@ -0,0 +1,194 @@
+# captcha_queue.py
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class CaptchaDetected(Exception):
+    """
+    Raised by the search engines instead of blocking on a captcha:
+    the caller parks the job here and keeps processing other profiles.
+    """
+
+    def __init__(self, engine: str, page_url: str, site_key: Optional[str] = None):
+        super().__init__(f"Captcha on {engine}: {page_url}")
+        self.engine = engine
+        self.page_url = page_url
+        self.site_key = site_key
+
+
+################################################
+# Solvers
+################################################
+
+
+class CaptchaSolver(ABC):
+    """Resolves a captcha challenge to a token (None if it can't)."""
+
+    @abstractmethod
+    def solve(self, challenge: CaptchaDetected) -> Optional[str]:
+        pass
+
+
+class TwoCaptchaSolver(CaptchaSolver):
+    def __init__(self, api_key: str, max_wait: int = 120):
+        self.api_key = api_key
+        self.max_wait = max_wait
+
+    def solve(self, challenge: CaptchaDetected) -> Optional[str]:
+        from search_engines import solve_recaptcha_2captcha
+
+        if not challenge.site_key:
+            return None
+        return solve_recaptcha_2captcha(
+            self.api_key, challenge.site_key, challenge.page_url, self.max_wait
+        )
+
+
+class FakeCaptchaSolver(CaptchaSolver):
+    """Local solver for tests: returns a fixed token after a delay."""
+
+    def __init__(self, token: Optional[str] = "fake-token", delay: float = 0.0):
+        self.token = token
+        self.delay = delay
+        self.calls = 0
+
+    def solve(self, challenge: CaptchaDetected) -> Optional[str]:
+        self.calls += 1
+        time.sleep(self.delay)
+        return self.token
+
+
+################################################
+# Parked jobs
+################################################
+
+
+class ParkedJob:
+    def __init__(self, job: Any, challenge: CaptchaDetected, ready_at: float):
+        self.job = job
+        self.challenge = challenge
+        self.ready_at = ready_at
+        self.attempts = 1
+        self.retrying = False
+        self.future: Optional[Future] = None
+
+    def is_ready(self, now: float) -> bool:
+        if self.retrying:
+            return False
+        if self.future is not None:
+            return self.future.done()
+        return now >= self.ready_at
+
+    def token(self) -> Optional[str]:
+        if self.future is None:
+            return None
+        try:
+            return self.future.result()
+        except Exception as e:
+            print(f"Captcha solver failed: {e}")
+            return None
+
+
+class ParkedJobQueue:
+    """
+    Jobs that hit a captcha wait here while the run continues with other
+    profiles. With a solver, the captchas are solved concurrently in a
+    thread pool and the job becomes ready when its token is available;
+    without one it becomes ready after the cooldown.
+    Jobs parked more than max_attempts times are given up.
+    """
+
+    def __init__(
+        self,
+        solver: Optional[CaptchaSolver] = None,
+        cooldown: float = 60.0,
+        max_attempts: int = 3,
+        max_workers: int = 4,
+    ):
+        self.solver = solver
+        self.cooldown = cooldown
+        self.max_attempts = max_attempts
+        self.executor = ThreadPoolExecutor(max_workers=max_workers) if solver else None
+        self.parked: Dict[Any, ParkedJob] = {}
+        self.lock = threading.Lock()
+        self.stats = {"parked": 0, "solved": 0, "given_up": 0}
+
+    def park(self, job: Any, challenge: CaptchaDetected) -> bool:
+        """
+        Parks the job. Returns False if it already used all its attempts
+        (the caller records it as failed).
+        """
+        with self.lock:
+            parked = self.parked.get(job)
+            if parked is None:
+                parked = ParkedJob(job, challenge, 0)
+            else:
+                parked.attempts += 1
+                parked.challenge = challenge
+            if parked.attempts > self.max_attempts:
+                self.parked.pop(job, None)
+                self.stats["given_up"] += 1
+                return False
+
+            parked.ready_at = time.time() + self.cooldown
+            parked.retrying = False
+            parked.future = None
+            if self.executor is not None and challenge.site_key:
+                parked.future = self.executor.submit(self.solver.solve, challenge)
+            self.parked[job] = parked
+            self.stats["parked"] += 1
+            return True
+
+    def pop_ready(self) -> List[Tuple[Any, Optional[str]]]:
+        """Jobs that can be retried now with their solved token (or None)."""
+        now = time.time()
+        ready = []
+        with self.lock:
+            for job, parked in list(self.parked.items()):
+                if parked.is_ready(now):
+                    token = parked.token()
+                    if token:
+                        self.stats["solved"] += 1
+                    ready.append((job, token))
+                    # Kept (with its attempt count) until forget() or park()
+                    parked.retrying = True
+        return ready
+
+    def abandon(self) -> List[Any]:
+        """Removes and returns all jobs that are still parked."""
+        with self.lock:
+            jobs = list(self.parked)
+            self.parked.clear()
+            self.stats["given_up"] += len(jobs)
+        return jobs
+
+    def forget(self, job: Any) -> None:
+        """Drops a job that finished after a retry."""
+        with self.lock:
+            self.parked.pop(job, None)
+
+    def jobs(self) -> List[Any]:
+        """Jobs parked or being retried (until forget() or abandon())."""
+        with self.lock:
+            return list(self.parked)
+
+    def pending(self) -> int:
+        with self.lock:
+            return sum(1 for p in self.parked.values() if not p.retrying)
+
+    def wait_ready(self, timeout: float) -> List[Tuple[Any, Optional[str]]]:
+        """Blocks until at least one job is ready (or timeout)."""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            ready = self.pop_ready()
+            if ready or not self.pending():
+                return ready
+            time.sleep(0.5)
+        return []
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,700 @@
+# cdp_browser.py
+import asyncio
+import base64
+import itertools
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from browser import BY_CSS_SELECTOR, BY_ID, BY_NAME, BY_XPATH, KEY_ENTER, KEY_RETURN
+from chrome_setup import (
+    CHROME_ARGUMENTS,
+    MASKING_SCRIPT,
+    PAGE_LOAD_TIMEOUT,
+    USER_AGENTS,
+)
+
+CHROME_BINARIES = (
+    "google-chrome",
+    "google-chrome-stable",
+    "chromium",
+    "chromium-browser",
+    "chrome",
+)
+CDP_TIMEOUT = float(os.environ.get("CDP_TIMEOUT", "30"))
+
+# Served by stub_documents
+STUB_DOCUMENT = b"<html><head></head><body></body></html>"
+
+_KEYS = re.compile(f"([{KEY_RETURN}{KEY_ENTER}])")
+
+# Same semantics as WebElement.get_attribute: the property if it is a
+# plain value (e.g. the absolute href), otherwise the attribute.
+_GET_ATTRIBUTE = """
+function(name) {
+    const value = this[name];
+    if (value !== undefined && value !== null
+            && typeof value !== 'object' && typeof value !== 'function') {
+        return String(value);
+    }
+    return this.getAttribute(name);
+}
+"""
+
+
+class CdpError(Exception):
+    """Error response to a DevTools command, or a lost connection."""
+
+
+def find_chrome_binary() -> str:
+    binary = os.environ.get("CHROME_BINARY")
+    if binary:
+        return binary
+    for name in CHROME_BINARIES:
+        path = shutil.which(name)
+        if path:
+            return path
+    raise CdpError("Chrome not found; set CHROME_BINARY.")
+
+
+def _locator_expression(by: str, value: str) -> str:
+    """JS expression returning the array of elements matching a locator."""
+    if by == BY_XPATH:
+        return (
+            "(() => { const r = document.evaluate("
+            f"{json.dumps(value)}, document, null, "
+            "XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null); const out = []; "
+            "for (let i = 0; i < r.snapshotLength; i++) out.push(r.snapshotItem(i)); "
+            "return out; })()"
+        )
+    if by == BY_ID:
+        selector = f"[id={json.dumps(value)}]"
+    elif by == BY_NAME:
+        selector = f"[name={json.dumps(value)}]"
+    elif by == BY_CSS_SELECTOR:
+        selector = value
+    else:
+        raise ValueError(f"Unsupported locator strategy: {by}")
+    return f"Array.from(document.querySelectorAll({json.dumps(selector)}))"
+
+
+def _check(result: Dict) -> Dict:
+    """Raises a JS exception reported by Runtime.evaluate/callFunctionOn."""
+    details = result.get("exceptionDetails")
+    if details:
+        exception = details.get("exception", {})
+        raise CdpError(exception.get("description") or details.get("text"))
+    return result
+
+
+################################################
+# Asyncio implementation
+################################################
+
+
+class CdpConnection:
+    """
+    One websocket to the browser endpoint. Tabs are attached in flat mode,
+    so the commands and events of every tab share this socket and are
+    routed by sessionId.
+    """
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.ids = itertools.count(1)
+        self.pending: Dict[int, asyncio.Future] = {}
+        self.listeners: Dict[Optional[str], List[Callable[[str, Dict], None]]] = {}
+        self.reader = asyncio.get_running_loop().create_task(self._read())
+
+    async def send(
+        self,
+        method: str,
+        params: Optional[Dict] = None,
+        session_id: Optional[str] = None,
+        timeout: float = CDP_TIMEOUT,
+    ) -> Dict:
+        message_id = next(self.ids)
+        message = {"id": message_id, "method": method, "params": params or {}}
+        if session_id:
+            message["sessionId"] = session_id
+        future = asyncio.get_running_loop().create_future()
+        self.pending[message_id] = future
+        try:
+            await self.websocket.send(json.dumps(message))
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self.pending.pop(message_id, None)
+
+    def listen(
+        self, session_id: Optional[str], callback: Callable[[str, Dict], None]
+    ) -> None:
+        """Calls callback(method, params) for every event of the session."""
+        self.listeners.setdefault(session_id, []).append(callback)
+
+    def unlisten(self, session_id: Optional[str], callback=None) -> None:
+        if callback is None:
+            self.listeners.pop(session_id, None)
+        elif callback in self.listeners.get(session_id, ()):
+            self.listeners[session_id].remove(callback)
+
+    def wait_for(self, session_id: Optional[str], method: str) -> asyncio.Future:
+        """
+        Future resolved with the params of the next `method` event.
+        Create it before sending the command that triggers the event.
+        """
+        future = asyncio.get_running_loop().create_future()
+
+        def callback(event: str, params: Dict) -> None:
+            if event == method and not future.done():
+                future.set_result(params)
+
+        self.listen(session_id, callback)
+        future.add_done_callback(lambda _: self.unlisten(session_id, callback))
+        return future
+
+    async def _read(self) -> None:
+        try:
+            async for raw in self.websocket:
+                message = json.loads(raw)
+                if "id" in message:
+                    future = self.pending.get(message["id"])
+                    if future is None or future.done():
+                        continue
+                    if "error" in message:
+                        future.set_exception(CdpError(message["error"].get("message")))
+                    else:
+                        future.set_result(message.get("result", {}))
+                    continue
+                session_id = message.get("sessionId")
+                for callback in list(self.listeners.get(session_id, ())):
+                    try:
+                        callback(message["method"], message.get("params", {}))
+                    except Exception as e:
+                        print(f"Error in DevTools event handler: {e}")
+        except Exception as e:
+            print(f"DevTools connection lost: {e}")
+        finally:
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(CdpError("DevTools connection closed"))
+
+    async def close(self) -> None:
+        await self.websocket.close()
+        await self.reader
+
+
+class AsyncCdpElement:
+    """Remote reference to a DOM element (a Runtime objectId)."""
+
+    def __init__(self, tab: "AsyncCdpTab", object_id: str):
+        self.tab = tab
+        self.object_id = object_id
+
+    async def _call(self, function: str, *args) -> Any:
+        result = await self.tab.send(
+            "Runtime.callFunctionOn",
+            {
+                "objectId": self.object_id,
+                "functionDeclaration": function,
+                "arguments": [{"value": arg} for arg in args],
+                "returnByValue": True,
+                "awaitPromise": True,
+            },
+        )
+        return _check(result)["result"].get("value")
+
+    async def text(self) -> str:
+        return await self._call(
+            "function() { return this.innerText || this.textContent || ''; }"
+        )
+
+    async def get_attribute(self, name: str) -> Optional[str]:
+        return await self._call(_GET_ATTRIBUTE, name)
+
+    async def click(self) -> None:
+        await self._call(
+            "function() { this.scrollIntoView({block: 'center'}); this.click(); }"
+        )
+
+    async def clear(self) -> None:
+        await self._call(
+            "function() { this.focus(); this.value = ''; "
+            "this.dispatchEvent(new Event('input', {bubbles: true})); }"
+        )
+
+    async def send_keys(self, *value: str) -> None:
+        """Types text into the element; KEY_ENTER/KEY_RETURN press Enter."""
+        await self._call("function() { this.focus(); }")
+        for chunk in _KEYS.split("".join(value)):
+            if chunk in (KEY_ENTER, KEY_RETURN):
+                await self.tab.press_enter()
+            elif chunk:
+                await self.tab.send("Input.insertText", {"text": chunk})
+
+
+class AsyncCdpTab:
+    """
+    A tab in its own browser context (cookies, cache and proxy),
+    attached to the shared DevTools connection.
+    """
+
+    def __init__(
+        self,
+        browser: "AsyncCdpBrowser",
+        context_id: str,
+        target_id: str,
+        session_id: str,
+    ):
+        self.browser = browser
+        self.connection = browser.connection
+        self.context_id = context_id
+        self.target_id = target_id
+        self.session_id = session_id
+        # (url, bytes sent, bytes received), drained by bandwidth.drain_traffic
+        self.traffic: List[Tuple[str, int, int]] = []
+        self.in_flight: Dict[str, Tuple[str, int]] = {}
+        self.credentials: Optional[Tuple[Optional[str], Optional[str]]] = None
+        self.stubbed: List[str] = []
+        # Answers to paused requests; referenced until done so they can't
+        # be garbage-collected (which would leave the request paused)
+        self.pending_answers: Set[asyncio.Task] = set()
+
+    async def send(self, method: str, params: Optional[Dict] = None) -> Dict:
+        return await self.connection.send(method, params, self.session_id)
+
+    async def setup(self, proxy: Optional[Dict] = None) -> None:
+        await self.send("Page.enable")
+        self.connection.listen(self.session_id, self._track_traffic)
+        await self.send("Network.enable")
+        await self.send(
+            "Page.addScriptToEvaluateOnNewDocument", {"source": MASKING_SCRIPT}
+        )
+        if proxy and (proxy.get("username") or proxy.get("password")):
+            # Unlike selenium-wire, no local proxy hop: Chrome asks for the
+            # credentials and we answer through the Fetch domain.
+            self.credentials = (proxy.get("username"), proxy.get("password"))
+        self.connection.listen(self.session_id, self._handle_fetch)
+        await self._enable_fetch()
+
+    async def _enable_fetch(self) -> None:
+        if self.credentials:
+            await self.send(
+                "Fetch.enable",
+                {"handleAuthRequests": True, "patterns": [{"urlPattern": "*"}]},
+            )
+        elif self.stubbed:
+            patterns = [
+                {"urlPattern": f"*{substring}*", "resourceType": "Document"}
+                for substring in self.stubbed
+            ]
+            await self.send("Fetch.enable", {"patterns": patterns})
+
+    async def stub_documents(self, substring: str) -> None:
+        """
+        Answers page loads of URLs containing substring with an empty page
+        instead of downloading them (the URL is kept, e.g. after a redirect).
+        """
+        self.stubbed.append(substring)
+        await self._enable_fetch()
+
+    def _track_traffic(self, event: str, params: Dict) -> None:
+        if event == "Network.requestWillBeSent":
+            redirect = params.get("redirectResponse")
+            if redirect and params["requestId"] in self.in_flight:
+                url, sent = self.in_flight.pop(params["requestId"])
+                received = int(redirect.get("encodedDataLength", 0))
+                self.traffic.append((url, sent, received))
+            request = params["request"]
+            sent = (
+                len(request["method"])
+                + len(request["url"])
+                + sum(len(k) + len(v) + 4 for k, v in request["headers"].items())
+                + len(request.get("postData", ""))
+            )
+            self.in_flight[params["requestId"]] = (request["url"], sent)
+        elif event in ("Network.loadingFinished", "Network.loadingFailed"):
+            entry = self.in_flight.pop(params["requestId"], None)
+            if entry is not None:
+                received = int(params.get("encodedDataLength", 0))
+                self.traffic.append((entry[0], entry[1], received))
+
+    async def pop_traffic(self) -> List[Tuple[str, int, int]]:
+        traffic, self.traffic = self.traffic, []
+        return traffic
+
+    def _handle_fetch(self, event: str, params: Dict) -> None:
+        if event == "Fetch.requestPaused":
+            url = params["request"]["url"]
+            if params.get("resourceType") == "Document" and any(
+                substring in url for substring in self.stubbed
+            ):
+                command = (
+                    "Fetch.fulfillRequest",
+                    {
+                        "requestId": params["requestId"],
+                        "responseCode": 200,
+                        "responseHeaders": [
+                            {"name": "Content-Type", "value": "text/html"}
+                        ],
+                        "body": base64.b64encode(STUB_DOCUMENT).decode("ascii"),
+                    },
+                )
+            else:
+                command = ("Fetch.continueRequest", {"requestId": params["requestId"]})
+        elif event == "Fetch.authRequired":
+            source = params.get("authChallenge", {}).get("source")
+            if source == "Proxy" and self.credentials:
+                username, password = self.credentials
+                response = {
+                    "response": "ProvideCredentials",
+                    "username": username or "",
+                    "password": password or "",
+                }
+            else:
+                response = {"response": "Default"}
+            command = (
+                "Fetch.continueWithAuth",
+                {
+                    "requestId": params["requestId"],
+                    "authChallengeResponse": response,
+                },
+            )
+        else:
+            return
+        task = asyncio.get_running_loop().create_task(self.send(*command))
+        self.pending_answers.add(task)
+        task.add_done_callback(self.pending_answers.discard)
+
+    async def get(self, url: str, timeout: float = PAGE_LOAD_TIMEOUT) -> None:
+        """
+        Navigates and waits for the load event. Past the timeout the page
+        stops loading and selenium's TimeoutException is raised, as with
+        a WebDriver page-load timeout.
+        """
+        from selenium.common.exceptions import TimeoutException
+
+        loaded = self.connection.wait_for(self.session_id, "Page.loadEventFired")
+        try:
+            result = await self.send("Page.navigate", {"url": url})
+            if result.get("errorText"):
+                raise CdpError(f"Navigation to {url} failed: {result['errorText']}")
+            await asyncio.wait_for(loaded, timeout)
+        except asyncio.TimeoutError:
+            await self.send("Page.stopLoading")
+            raise TimeoutException(f"Page load of {url} timed out after {timeout}s")
+        finally:
+            loaded.cancel()
+
+    async def evaluate(self, expression: str) -> Any:
+        result = await self.send(
+            "Runtime.evaluate",
+            {"expression": expression, "returnByValue": True, "awaitPromise": True},
+        )
+        return _check(result)["result"].get("value")
+
+    async def current_url(self) -> str:
+        return await self.evaluate("location.href")
+
+    async def page_source(self) -> str:
+        return await self.evaluate("document.documentElement.outerHTML")
+
+    async def title(self) -> str:
+        return await self.evaluate("document.title")
+
+    async def execute_script(self, script: str, *args) -> Any:
+        """Runs a WebDriver-style script body; args must be JSON values."""
+        return await self.evaluate(
+            f"(function() {{ {script} }}).apply(null, {json.dumps(list(args))})"
+        )
+
+    async def find_elements(self, by: str, value: str) -> List[AsyncCdpElement]:
+        result = _check(
+            await self.send(
+                "Runtime.evaluate", {"expression": _locator_expression(by, value)}
+            )
+        )
+        array_id = result["result"]["objectId"]
+        properties = await self.send(
+            "Runtime.getProperties", {"objectId": array_id, "ownProperties": True}
+        )
+        await self.send("Runtime.releaseObject", {"objectId": array_id})
+        items = [p for p in properties["result"] if p["name"].isdigit()]
+        items.sort(key=lambda p: int(p["name"]))
+        return [AsyncCdpElement(self, p["value"]["objectId"]) for p in items]
+
+    async def find_element(self, by: str, value: str) -> AsyncCdpElement:
+        from selenium.common.exceptions import NoSuchElementException
+
+        elements = await self.find_elements(by, value)
+        if not elements:
+            raise NoSuchElementException(f"No element for {by}={value!r}")
+        return elements[0]
+
+    async def press_enter(self) -> None:
+        key = {
+            "key": "Enter",
+            "code": "Enter",
+            "windowsVirtualKeyCode": 13,
+            "nativeVirtualKeyCode": 13,
+        }
+        await self.send(
+            "Input.dispatchKeyEvent", {"type": "keyDown", "text": "\r", **key}
+        )
+        await self.send("Input.dispatchKeyEvent", {"type": "keyUp", **key})
+
+    async def close(self) -> None:
+        """Closes the tab and disposes its browser context."""
+        self.connection.unlisten(self.session_id)
+        try:
+            await self.connection.send(
+                "Target.closeTarget", {"targetId": self.target_id}
+            )
+            await self.connection.send(
+                "Target.disposeBrowserContext", {"browserContextId": self.context_id}
+            )
+        except CdpError as e:
+            print("Error disposing browser context:", e)
+        if self in self.browser.tabs:
+            self.browser.tabs.remove(self)
+
+
+class AsyncCdpBrowser:
+    """
+    Chrome driven directly over the DevTools protocol: no chromedriver and
+    no WebDriver HTTP hop, one websocket for all tabs. Every tab gets its
+    own browser context, so tabs are as isolated as separate drivers, and
+    one event loop can drive dozens of them concurrently.
+    """
+
+    def __init__(self, connection: CdpConnection, process=None, user_data_dir=None):
+        self.connection = connection
+        self.process = process
+        self.user_data_dir = user_data_dir
+        self.tabs: List[AsyncCdpTab] = []
+
+    @classmethod
+    async def launch(
+        cls,
+        headless: bool = True,
+        binary: Optional[str] = None,
+        timeout: float = CDP_TIMEOUT,
+    ) -> "AsyncCdpBrowser":
+        """Starts a Chrome process with a throw-away profile and connects to it."""
+        user_data_dir = tempfile.mkdtemp(prefix="cdp-profile-")
+        args = [
+            binary or find_chrome_binary(),
+            "--remote-debugging-port=0",
+            f"--user-data-dir={user_data_dir}",
+            f"--user-agent={random.choice(USER_AGENTS)}",
+            *CHROME_ARGUMENTS,
+        ]
+        if headless:
+            args.append("--headless=new")
+        args.append("about:blank")
+        process = subprocess.Popen(
+            args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+
+        # Chrome writes the chosen port and the browser endpoint path here
+        port_file = os.path.join(user_data_dir, "DevToolsActivePort")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        lines: List[str] = []
+        while len(lines) < 2:
+            if process.poll() is not None:
+                shutil.rmtree(user_data_dir, ignore_errors=True)
+                raise CdpError(f"Chrome exited with code {process.returncode}")
+            if loop.time() > deadline:
+                process.kill()
+                shutil.rmtree(user_data_dir, ignore_errors=True)
+                raise CdpError("Chrome did not open a DevTools port in time")
+            await asyncio.sleep(0.1)
+            if os.path.exists(port_file):
+                with open(port_file, encoding="utf-8") as f:
+                    lines = f.read().split()
+
+        ws_url = f"ws://127.0.0.1:{lines[0]}{lines[1]}"
+        return await cls.connect(ws_url, process, user_data_dir)
+
+    @classmethod
+    async def connect(
+        cls, ws_url: str, process=None, user_data_dir=None
+    ) -> "AsyncCdpBrowser":
+        """Connects to a browser endpoint (ws://host:port/devtools/browser/...)."""
+        import websockets
+
+        websocket = await websockets.connect(ws_url, max_size=None, ping_interval=None)
+        return cls(CdpConnection(websocket), process, user_data_dir)
+
+    async def new_tab(self, proxy: Optional[Dict] = None) -> AsyncCdpTab:
+        params = {"disposeOnDetach": True}
+        if proxy:
+            params["proxyServer"] = f"http://{proxy['proxy_address']}:{proxy['port']}"
+            print(
+                f"New CDP tab with proxy {proxy['proxy_address']}:{proxy['port']} "
+                f"(Country: {proxy.get('country_code')})"
+            )
+        send = self.connection.send
+        context_id = (await send("Target.createBrowserContext", params))[
+            "browserContextId"
+        ]
+        target_id = (
+            await send(
+                "Target.createTarget",
+                {"url": "about:blank", "browserContextId": context_id},
+            )
+        )["targetId"]
+        session_id = (
+            await send(
+                "Target.attachToTarget", {"targetId": target_id, "flatten": True}
+            )
+        )["sessionId"]
+
+        tab = AsyncCdpTab(self, context_id, target_id, session_id)
+        self.tabs.append(tab)
+        await tab.setup(proxy)
+        return tab
+
+    async def close(self) -> None:
+        for tab in list(self.tabs):
+            await tab.close()
+        if self.process is not None:
+            try:
+                await self.connection.send("Browser.close", timeout=5)
+            except (CdpError, asyncio.TimeoutError):
+                pass
+        await self.connection.close()
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        if self.user_data_dir:
+            shutil.rmtree(self.user_data_dir, ignore_errors=True)
+
+
+################################################
+# Synchronous facade
+################################################
+
+
+class CdpElement:
+    """Blocking BrowserElement over an AsyncCdpElement."""
+
+    def __init__(self, tab: "CdpTab", element: AsyncCdpElement):
+        self._tab = tab
+        self._element = element
+
+    @property
+    def text(self) -> str:
+        return self._tab._run(self._element.text())
+
+    def get_attribute(self, name: str) -> Optional[str]:
+        return self._tab._run(self._element.get_attribute(name))
+
+    def click(self) -> None:
+        self._tab._run(self._element.click())
+
+    def clear(self) -> None:
+        self._tab._run(self._element.clear())
+
+    def send_keys(self, *value: str) -> None:
+        self._tab._run(self._element.send_keys(*value))
+
+
+class CdpTab:
+    """
+    Blocking BrowserHandle over an AsyncCdpTab, for the synchronous
+    pipeline (search_engines, parser_logic). Calls from several threads
+    run concurrently on the browser's event loop.
+    """
+
+    profile_dir = None
+
+    def __init__(self, browser: "CdpBrowser", tab: AsyncCdpTab):
+        self.browser = browser
+        self.tab = tab
+
+    def _run(self, coroutine) -> Any:
+        return self.browser.run(coroutine)
+
+    def get(self, url: str) -> None:
+        self._run(self.tab.get(url))
+
+    @property
+    def current_url(self) -> str:
+        return self._run(self.tab.current_url())
+
+    @property
+    def page_source(self) -> str:
+        return self._run(self.tab.page_source())
+
+    @property
+    def title(self) -> str:
+        return self._run(self.tab.title())
+
+    def find_element(self, by: str, value: str) -> CdpElement:
+        return CdpElement(self, self._run(self.tab.find_element(by, value)))
+
+    def find_elements(self, by: str, value: str) -> List[CdpElement]:
+        return [
+            CdpElement(self, element)
+            for element in self._run(self.tab.find_elements(by, value))
+        ]
+
+    def execute_script(self, script: str, *args) -> Any:
+        return self._run(self.tab.execute_script(script, *args))
+
+    def pop_traffic(self) -> List[Tuple[str, int, int]]:
+        return self._run(self.tab.pop_traffic())
+
+    def stub_documents(self, substring: str) -> None:
+        self._run(self.tab.stub_documents(substring))
+
+    def execute_cdp_cmd(self, cmd: str, cmd_args: Dict) -> Dict:
+        return self._run(self.tab.send(cmd, cmd_args))
+
+    def quit(self) -> None:
+        self._run(self.tab.close())
+
+
+class CdpBrowser:
+    """
+    Runs an AsyncCdpBrowser on an event loop in a background thread and
+    hands out blocking CdpTab handles. Same interface as
+    BrowserContextPool: new_context(proxy) and close().
+    ws_url connects to an already running Chrome instead of launching one.
+    """
+
+    def __init__(
+        self,
+        headless: bool = True,
+        ws_url: Optional[str] = None,
+        binary: Optional[str] = None,
+    ):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        if ws_url:
+            self.browser = self.run(AsyncCdpBrowser.connect(ws_url))
+        else:
+            self.browser = self.run(AsyncCdpBrowser.launch(headless, binary))
+
+    def run(self, coroutine) -> Any:
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def new_context(self, proxy: Optional[Dict] = None) -> CdpTab:
+        return CdpTab(self, self.run(self.browser.new_tab(proxy)))
+
+    def close(self) -> None:
+        try:
+            self.run(self.browser.close())
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=5)
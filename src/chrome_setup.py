@@ -1,67 +1,104 @@
 # chrome_setup.py
+import os
 import random
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 
-try:
-    from seleniumwire import webdriver as wire_webdriver
-except ImportError:
-    wire_webdriver = None
-
-
-def setup_chrome_driver(proxy=None, headless: bool = False, verify_ssl: bool = False):
+# Limit of the HTTP cache kept in a persistent profile
+PROFILE_DISK_CACHE_SIZE = 100 * 1024**2
+
+# Deadlines (seconds): navigation, injected scripts, and any single driver
+# command such as an element lookup (must exceed the other two)
+PAGE_LOAD_TIMEOUT = float(os.environ.get("PAGE_LOAD_TIMEOUT", "30"))
+SCRIPT_TIMEOUT = float(os.environ.get("SCRIPT_TIMEOUT", "10"))
+COMMAND_TIMEOUT = float(os.environ.get("COMMAND_TIMEOUT", "60"))
+
+# Command-line switches shared by every browser backend
+CHROME_ARGUMENTS = [
+    "--disable-gpu",
+    "--disable-software-rasterizer",
+    "--disable-webgl",
+    "--disable-webgl-image-chromium",
+    "--disable-accelerated-2d-canvas",
+    "--disable-accelerated-video-decode",
+    # Stop WebRTC
+    "--disable-webrtc",
+    "--disable-features=WebRtcHideLocalIpsWithMdns",
+    "--enable-features=WebRtcRemoteEventLog",
+    # Other important settings
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-infobars",
+    "--disable-breakpad",
+    "--disable-component-update",
+    "--disable-background-networking",
+    # Disable logging
+    "--log-level=3",
+    "--silent",
+    "--window-size=1920,1080",
+    "--disable-blink-features=AutomationControlled",
+    "--lang=en",
+]
+
+# Several user-agents
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
+    "AppleWebKit/537.36 (KHTML, like Gecko)"
+    "Chrome/112.0.5615.49 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:110.0)"
+    "Gecko/20100101 Firefox/110.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)"
+    "AppleWebKit/605.1.15 (KHTML, like Gecko)"
+    "Version/15.1 Safari/605.1.15",
+]
+
+# Hides navigator.webdriver in every new document
+MASKING_SCRIPT = """
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => undefined
+    });
+"""
+
+
+def setup_chrome_driver(
+    proxy=None,
+    headless: bool = False,
+    verify_ssl: bool = False,
+    user_data_dir=None,
+):
     """
     A function that sets up and returns a Chrome driver.
-
+    Selenium, webdriver_manager and selenium-wire are imported on the first
+    call, so importing this module is cheap.
+    user_data_dir: persistent profile directory (see profile_cache.py),
+    available afterwards as driver.profile_dir.
     """
-    chrome_options = Options()
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.remote.remote_connection import RemoteConnection
+    from webdriver_manager.chrome import ChromeDriverManager
 
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--disable-software-rasterizer")
-    chrome_options.add_argument("--disable-webgl")
-    chrome_options.add_argument("--disable-webgl-image-chromium")
-    chrome_options.add_argument("--disable-accelerated-2d-canvas")
-    chrome_options.add_argument("--disable-accelerated-video-decode")
+    try:
+        from seleniumwire import webdriver as wire_webdriver
+    except ImportError:
+        wire_webdriver = None
 
-    # Stop WebRTC
-    chrome_options.add_argument("--disable-webrtc")
-    chrome_options.add_argument("--disable-features=WebRtcHideLocalIpsWithMdns")
-    chrome_options.add_argument("--enable-features=WebRtcRemoteEventLog")
-
-    # Other important settings
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--disable-infobars")
-    chrome_options.add_argument("--disable-breakpad")
-    chrome_options.add_argument("--disable-component-update")
-    chrome_options.add_argument("--disable-background-networking")
+    # HTTP timeout of every WebDriver command (class-wide in selenium)
+    RemoteConnection.set_timeout(COMMAND_TIMEOUT)
 
+    chrome_options = Options()
+    for argument in CHROME_ARGUMENTS:
+        chrome_options.add_argument(argument)
     # Disable logging
-    chrome_options.add_argument("--log-level=3")
-    chrome_options.add_argument("--silent")
     chrome_options.add_experimental_option("excludeSwitches", ["enable-logging"])
 
-    chrome_options.add_argument("--window-size=1920,1080")
-    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-    chrome_options.add_argument("--lang=en")
-
     if headless:
         chrome_options.add_argument("--headless=new")
 
-    # Several user-agents
-    user_agents = [
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
-        "AppleWebKit/537.36 (KHTML, like Gecko)"
-        "Chrome/112.0.5615.49 Safari/537.36",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:110.0)"
-        "Gecko/20100101 Firefox/110.0",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)"
-        "AppleWebKit/605.1.15 (KHTML, like Gecko)"
-        "Version/15.1 Safari/605.1.15",
-    ]
-    chrome_options.add_argument(f"user-agent={random.choice(user_agents)}")
+    if user_data_dir:
+        chrome_options.add_argument(f"--user-data-dir={user_data_dir}")
+        chrome_options.add_argument(f"--disk-cache-size={PROFILE_DISK_CACHE_SIZE}")
+
+    chrome_options.add_argument(f"user-agent={random.choice(USER_AGENTS)}")
 
     service = Service(ChromeDriverManager().install())
 
@@ -102,12 +139,9 @@ def setup_chrome_driver(proxy=None, headless: bool = False, verify_ssl: bool = F
     # Selenium masking
     driver.execute_cdp_cmd(
         "Page.addScriptToEvaluateOnNewDocument",
-        {
-            "source": """
-                Object.defineProperty(navigator, 'webdriver', {
-                    get: () => undefined
-                });
-            """
-        },
+        {"source": MASKING_SCRIPT},
     )
+    driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+    driver.set_script_timeout(SCRIPT_TIMEOUT)
+    driver.profile_dir = user_data_dir
     return driver
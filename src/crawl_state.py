@@ -0,0 +1,147 @@
+# crawl_state.py
+import hashlib
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from results_db import result_status
+from url_utils import canonical_url
+
+DAY = 24 * 3600
+
+
+def content_hash(result: Dict[str, Any]) -> str:
+    """Hash of the extracted data, used to tell whether a profile changed."""
+    raw = "\x1f".join(
+        (result.get(field) or "").strip()
+        for field in ("LinkedInURL", "FullName", "Location")
+    )
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class CrawlStateStore:
+    """
+    Crawl state per canonical profile: last crawl time, status, content hash
+    and revisit interval.
+    - A successful crawl with unchanged data stretches the interval
+      (x growth, up to max_interval); changed data resets it to base_interval.
+    - Failed crawls (authwall, captcha, not found) are retried after
+      retry_interval.
+    plan() skips profiles that are fresh enough and orders the rest by
+    staleness, boosted by how often the profile's data used to change.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        base_interval: float = 30 * DAY,
+        max_interval: float = 180 * DAY,
+        retry_interval: float = 1 * DAY,
+        growth: float = 2.0,
+    ):
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self.retry_interval = retry_interval
+        self.growth = growth
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS crawl_state (
+                key TEXT PRIMARY KEY,
+                last_crawl REAL NOT NULL,
+                status TEXT NOT NULL,
+                content_hash TEXT,
+                interval REAL NOT NULL,
+                crawls INTEGER NOT NULL DEFAULT 0,
+                changes INTEGER NOT NULL DEFAULT 0
+            );
+            """
+        )
+        self.conn.commit()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Tuple]:
+        """key -> (last_crawl, status, content_hash, interval, crawls, changes)"""
+        keys = list(keys)
+        states = {}
+        for i in range(0, len(keys), 500):
+            chunk = keys[i : i + 500]
+            cur = self.conn.execute(
+                "SELECT key, last_crawl, status, content_hash, interval, crawls, "
+                f"changes FROM crawl_state WHERE key IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for row in cur:
+                states[row[0]] = row[1:]
+        return states
+
+    def record(self, result: Dict[str, Any], now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        key = canonical_url(result["Original"])
+        previous = self.get_many([key]).get(key)
+        status = result_status(result)
+
+        if status != "ok":
+            new_hash = previous[2] if previous else None
+            interval = self.retry_interval
+            changes = previous[5] if previous else 0
+        else:
+            new_hash = content_hash(result)
+            if previous and previous[2] == new_hash and previous[1] == "ok":
+                interval = min(previous[3] * self.growth, self.max_interval)
+                changes = previous[5]
+            else:
+                interval = self.base_interval
+                # The first successful crawl is not a change
+                changes = (previous[5] if previous else 0) + bool(
+                    previous and previous[2] and previous[2] != new_hash
+                )
+        crawls = (previous[4] if previous else 0) + 1
+
+        self.conn.execute(
+            """
+            INSERT INTO crawl_state (key, last_crawl, status, content_hash,
+                                     interval, crawls, changes)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (key) DO UPDATE SET
+                last_crawl = excluded.last_crawl,
+                status = excluded.status,
+                content_hash = excluded.content_hash,
+                interval = excluded.interval,
+                crawls = excluded.crawls,
+                changes = excluded.changes
+            """,
+            (key, now, status, new_hash, interval, crawls, changes),
+        )
+        self.conn.commit()
+
+    def plan(
+        self, profiles: List[str], now: Optional[float] = None
+    ) -> Tuple[List[str], int]:
+        """
+        Returns (profiles to crawl, most urgent first; number skipped).
+        Never crawled profiles come first, then by staleness
+        (time since last crawl / interval) x (1 + change rate).
+        """
+        now = time.time() if now is None else now
+        keys = [canonical_url(p) for p in profiles]
+        states = self.get_many(set(keys))
+        due: List[Tuple[float, int, str]] = []
+        skipped = 0
+        for index, (profile, key) in enumerate(zip(profiles, keys)):
+            state = states.get(key)
+            if state is None:
+                due.append((float("inf"), index, profile))
+                continue
+            last_crawl, _, _, interval, crawls, changes = state
+            staleness = (now - last_crawl) / interval
+            if staleness < 1:
+                skipped += 1
+                continue
+            change_rate = changes / crawls if crawls else 1.0
+            due.append((staleness * (1 + change_rate), index, profile))
+        due.sort(key=lambda item: (-item[0], item[1]))
+        return [profile for _, _, profile in due], skipped
+
+    def close(self) -> None:
+        self.conn.close()
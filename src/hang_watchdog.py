@@ -0,0 +1,132 @@
+# hang_watchdog.py
+import os
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
+# Not in the signal module on Windows
+_KILL = getattr(signal, "SIGKILL", signal.SIGTERM)
+
+
+class DriverHung(Exception):
+    """The operation ran past its budget and the driver was killed."""
+
+
+def _child_pids(pid: int) -> List[int]:
+    """Descendants of a process (Chrome and its helpers under chromedriver)."""
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        try:
+            return [p.pid for p in psutil.Process(pid).children(recursive=True)]
+        except psutil.Error:
+            return []
+
+    # Linux without psutil: parent pids from /proc
+    if not os.path.isdir("/proc"):
+        return []
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", encoding="utf-8") as f:
+                # "pid (comm) state ppid ...", comm may contain spaces
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    descendants, stack = [], [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            descendants.append(child)
+            stack.append(child)
+    return descendants
+
+
+def kill_driver(driver) -> None:
+    """
+    Kills chromedriver and every Chrome process under it, so the call blocked
+    on the driver fails at once. CDP tabs are closed instead (over their own
+    websocket session). Browser-context handles are not covered: closing one
+    needs the pool lock held by the hung command, which ends at the
+    WebDriver command timeout (COMMAND_TIMEOUT) instead.
+    """
+    if getattr(driver, "pool", None) is not None:
+        print(
+            "Watchdog can't interrupt a browser-context handle, "
+            "waiting for the command timeout."
+        )
+        return
+    service = getattr(driver, "service", None)
+    process = getattr(service, "process", None)
+    if process is None:
+        threading.Thread(target=driver.quit, daemon=True).start()
+        return
+    # Collected first: once chromedriver dies its children are re-parented
+    for pid in reversed(_child_pids(process.pid)):
+        try:
+            os.kill(pid, _KILL)
+        except OSError:
+            pass
+    process.kill()
+
+
+class HangWatchdog:
+    """
+    Background thread enforcing a time budget on driver operations:
+    when the block inside watch() runs longer than `budget` seconds the
+    driver is killed, and the block raises DriverHung so the caller can
+    requeue the work and start a new driver.
+    """
+
+    def __init__(self, budget: float, poll_interval: float = 1.0):
+        self.budget = budget
+        self.poll_interval = poll_interval
+        self.lock = threading.Lock()
+        self.driver = None
+        self.deadline = 0.0
+        self.fired = False
+        self.kills = 0
+        self.thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.poll_interval)
+            with self.lock:
+                if self.driver is None or time.monotonic() < self.deadline:
+                    continue
+                driver, self.driver = self.driver, None
+                self.fired = True
+                self.kills += 1
+            print(f"Watchdog: operation exceeded {self.budget:.0f}s, killing driver.")
+            try:
+                kill_driver(driver)
+            except Exception as e:
+                print("Watchdog could not kill the driver:", e)
+
+    @contextmanager
+    def watch(self, driver, budget: Optional[float] = None):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+        budget = self.budget if budget is None else budget
+        with self.lock:
+            self.driver = driver
+            self.deadline = time.monotonic() + budget
+            self.fired = False
+        try:
+            yield
+        except Exception as e:
+            if self.fired:
+                raise DriverHung(f"Driver hung for more than {budget:.0f}s") from e
+            raise
+        finally:
+            with self.lock:
+                self.driver = None
+        if self.fired:
+            raise DriverHung(f"Driver hung for more than {budget:.0f}s")
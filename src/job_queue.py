@@ -0,0 +1,306 @@
+# job_queue.py
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Union,
+)
+
+
+class Job(NamedTuple):
+    id: Optional[int]
+    profile: str
+
+
+def default_worker_id() -> str:
+    """Unique id of this worker: host name + process id."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+################################################
+# Base class
+################################################
+
+
+class BaseJobQueue(ABC):
+    """
+    Shared work queue for several parser processes/nodes.
+    Workers claim batches of profiles with a lease, extend the lease with
+    heartbeats while working and report results back.
+    Leases that expire (dead worker) are given to the next worker.
+    Jobs belong to a run (e.g. "2024-06" for a monthly crawl): a profile is
+    processed once per run, and a new run id enqueues it again.
+    """
+
+    @abstractmethod
+    def enqueue(self, profiles: Iterable[str]) -> int:
+        """Adds profiles to the queue, duplicates are ignored.
+        Returns the number of new jobs."""
+        pass
+
+    @abstractmethod
+    def claim(self, worker_id: str, batch_size: int, lease_seconds: float) -> List[Job]:
+        """Leases up to batch_size pending jobs to the worker."""
+        pass
+
+    @abstractmethod
+    def heartbeat(
+        self, worker_id: str, job_ids: List[int], lease_seconds: float
+    ) -> int:
+        """Extends the lease of jobs still held by the worker."""
+        pass
+
+    @abstractmethod
+    def complete(self, job_id: int, worker_id: str, result: Dict[str, Any]) -> bool:
+        """Stores the result. Idempotent: only the first call for a job is
+        recorded, returns False for repeated calls."""
+        pass
+
+    @abstractmethod
+    def release(self, job_id: int, worker_id: str) -> bool:
+        """Returns a leased job to the queue without a result."""
+        pass
+
+    @abstractmethod
+    def reclaim_expired(self) -> int:
+        """Makes jobs with expired leases available again."""
+        pass
+
+    @abstractmethod
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status."""
+        pass
+
+    @contextmanager
+    def keep_alive(
+        self,
+        worker_id: str,
+        job_ids: Union[List[int], Callable[[], List[int]]],
+        lease_seconds: float,
+        interval: Optional[float] = None,
+    ):
+        """Sends heartbeats for job_ids from a background thread while the
+        block is running. job_ids can be a callable returning the ids held
+        at the time of each heartbeat."""
+        interval = interval or max(lease_seconds / 3, 1.0)
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(interval):
+                try:
+                    ids = job_ids() if callable(job_ids) else job_ids
+                    self.heartbeat(worker_id, ids, lease_seconds)
+                except Exception as e:
+                    print("Error sending heartbeat:", e)
+
+        thread = threading.Thread(target=beat, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def iter_batches(
+        self, worker_id: str, batch_size: int = 10, lease_seconds: float = 300
+    ) -> Iterator[List[Job]]:
+        """Claims batches until the queue is drained. The lease of a batch is
+        kept alive until the next batch is requested."""
+        while True:
+            batch = self.claim(worker_id, batch_size, lease_seconds)
+            if not batch:
+                return
+            with self.keep_alive(worker_id, [job.id for job in batch], lease_seconds):
+                yield batch
+
+    def iter_jobs(
+        self, worker_id: str, batch_size: int = 10, lease_seconds: float = 300
+    ) -> Iterator[Job]:
+        """Jobs of iter_batches one by one."""
+        for batch in self.iter_batches(worker_id, batch_size, lease_seconds):
+            yield from batch
+
+
+################################################
+# SQLite
+################################################
+
+
+class SQLiteJobQueue(BaseJobQueue):
+    """
+    Job queue in a SQLite file. Works for several processes on one machine
+    or on a shared file system with proper locking.
+    Only the jobs of the given run are enqueued, claimed and counted.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run TEXT NOT NULL DEFAULT '',
+            profile TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            worker TEXT,
+            lease_expires REAL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            result TEXT,
+            updated_at REAL,
+            UNIQUE (run, profile)
+        )
+    """
+
+    def __init__(self, path: str, run: str = ""):
+        self.path = path
+        self.run = run
+        with self._connect() as conn:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(jobs)")]
+            if columns and "run" not in columns:
+                # Queue files from before runs: their jobs belong to run ""
+                conn.execute("ALTER TABLE jobs RENAME TO jobs_old")
+                conn.execute(self._SCHEMA)
+                conn.execute(
+                    "INSERT INTO jobs (id, profile, status, worker, lease_expires, "
+                    "attempts, result, updated_at) SELECT id, profile, status, "
+                    "worker, lease_expires, attempts, result, updated_at "
+                    "FROM jobs_old"
+                )
+                conn.execute("DROP TABLE jobs_old")
+            conn.execute(self._SCHEMA)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (run, status, id)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        # One connection per operation keeps the queue safe to use from
+        # heartbeat threads and forked worker processes.
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def enqueue(self, profiles: Iterable[str]) -> int:
+        now = time.time()
+        rows = [(self.run, p.strip(), now) for p in profiles if p and p.strip()]
+        with self._connect() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO jobs (run, profile, updated_at) "
+                "VALUES (?, ?, ?)",
+                rows,
+            )
+            return conn.total_changes - before
+
+    def _reclaim(self, conn, now: float) -> int:
+        cur = conn.execute(
+            "UPDATE jobs SET status = 'pending', worker = NULL, lease_expires = NULL, "
+            "updated_at = ? WHERE status = 'leased' AND lease_expires < ?",
+            (now, now),
+        )
+        return cur.rowcount
+
+    def claim(self, worker_id: str, batch_size: int, lease_seconds: float) -> List[Job]:
+        now = time.time()
+        with self._connect() as conn:
+            self._reclaim(conn, now)
+            rows = conn.execute(
+                "SELECT id, profile FROM jobs WHERE run = ? AND status = 'pending' "
+                "ORDER BY id LIMIT ?",
+                (self.run, batch_size),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE jobs SET status = 'leased', worker = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                [(worker_id, now + lease_seconds, now, row[0]) for row in rows],
+            )
+        return [Job(row[0], row[1]) for row in rows]
+
+    def heartbeat(
+        self, worker_id: str, job_ids: List[int], lease_seconds: float
+    ) -> int:
+        now = time.time()
+        with self._connect() as conn:
+            cur = conn.executemany(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                [(now + lease_seconds, now, job_id, worker_id) for job_id in job_ids],
+            )
+            return cur.rowcount
+
+    def complete(self, job_id: int, worker_id: str, result: Dict[str, Any]) -> bool:
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET status = 'done', worker = ?, lease_expires = NULL, "
+                "result = ?, updated_at = ? WHERE id = ? AND status != 'done'",
+                (worker_id, json.dumps(result), time.time(), job_id),
+            )
+            return cur.rowcount == 1
+
+    def release(self, job_id: int, worker_id: str) -> bool:
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET status = 'pending', worker = NULL, "
+                "lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (time.time(), job_id, worker_id),
+            )
+            return cur.rowcount == 1
+
+    def reclaim_expired(self) -> int:
+        with self._connect() as conn:
+            return self._reclaim(conn, time.time())
+
+    def counts(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT status, COUNT(*) FROM jobs WHERE run = ? GROUP BY status",
+                (self.run,),
+            ).fetchall()
+        return {status: count for status, count in rows}
+
+    def results(self) -> List[Dict[str, Any]]:
+        """Results of all finished jobs in queue order."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT result FROM jobs WHERE run = ? AND status = 'done' "
+                "ORDER BY id",
+                (self.run,),
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+
+################################################
+# Factory
+################################################
+
+
+def get_job_queue(queue_url: str, run: str = "") -> BaseJobQueue:
+    """
+    Creates a queue backend from a URL, for the jobs of the given run.
+    Supported: "sqlite:///path/to/queue.db" or a plain file path.
+    """
+    if queue_url.startswith("sqlite:///"):
+        return SQLiteJobQueue(queue_url[len("sqlite:///"):], run)
+    if "://" not in queue_url:
+        return SQLiteJobQueue(queue_url, run)
+    raise ValueError(f"Unsupported job queue backend: {queue_url}")
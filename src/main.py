@@ -3,13 +3,38 @@ import os
 import time
 import random
 import csv
-from typing import Dict, Any, List
+import sys
+from contextlib import nullcontext
+from itertools import islice
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
 
-from sheets_helper import read_profiles_csv, read_profiles_gsheet
+# Heavy dependencies (selenium, pandas, gspread, requests) are imported lazily
+# by these modules; readers, engines and proxy providers are resolved by name
+# through the registry, so a CSV-only or dry run imports only what it uses.
+from registry import resolve
+from sheets_helper import BatchedSheetWriter, open_worksheet
 from chrome_setup import setup_chrome_driver
-from proxy_helper import WebshareProxyManager
-from search_engines import get_search_engine
 from parser_logic import extract_linkedin_info
+from profile_cache import ChromeProfileCache
+from browser_contexts import BrowserContextPool
+from batch_search import BatchSearcher
+from selector_registry import get_selector_registry
+from captcha_queue import CaptchaDetected, ParkedJobQueue, TwoCaptchaSolver
+from job_queue import Job, default_worker_id, get_job_queue
+from results_db import ResultsDatabase
+from crawl_state import DAY, CrawlStateStore
+from bandwidth import BandwidthAccountant
+from authwall import AuthwallEstimator, install_authwall_guard
+from hang_watchdog import DriverHung, HangWatchdog
+from page_archive import PROFILE, SERP_PREFIX, PageArchive
+from url_utils import (
+    ROUTE_LINKEDIN,
+    ROUTE_NAME,
+    ROUTE_URL,
+    classify_inputs,
+    linkedin_profile_url,
+    route_counts,
+)
 
 OUTPUT_FILE = "linkedin_results.csv"
 FIELDNAMES = ["Original", "LinkedInURL", "FullName", "Location", "IPChange"]
@@ -26,33 +51,76 @@ def write_result(row: Dict[str, Any]) -> None:
         csvfile.flush()
 
 
-def process_profile(driver, profile_url: str, search_engine) -> Dict[str, Any]:
+def empty_result(
+    profile_url: str, status: str, found_url: str = ""
+) -> Dict[str, Any]:
+    """Result row without profile data (not found, authwall, captcha)."""
+    return {
+        "Original": profile_url,
+        "LinkedInURL": found_url,
+        "FullName": "",
+        "Location": "",
+        "IPChange": status,
+    }
+
+
+def process_profile(
+    driver,
+    profile_url: str,
+    search_engine,
+    captcha_token: Optional[str] = None,
+    bandwidth: Optional[BandwidthAccountant] = None,
+    archive: Optional[PageArchive] = None,
+) -> Dict[str, Any]:
     """
     Processes one profile using the provided driver.
     Function:
       - searches for a LinkedIn link through the search engine,
       - goes to the profile page and extracts data.
     IMPORTANT: driver is not closed inside this function.
+    Raises CaptchaDetected if the search hits a captcha that captcha_token
+    (from a solver) doesn't resolve.
+    The traffic of each stage is collected into bandwidth if given, the
+    SERP and profile page sources are stored in archive if given.
+    """
+    try:
+        found_url = search_engine.search_linkedin_profile(
+            driver, profile_url, captcha_token=captcha_token
+        )
+    finally:
+        if bandwidth is not None:
+            bandwidth.collect(driver, "search")
+    if archive is not None:
+        archive.put(
+            driver.current_url,
+            SERP_PREFIX + search_engine.name,
+            driver.page_source,
+            profile_url,
+        )
+    return process_found_url(driver, profile_url, found_url, bandwidth, archive)
+
+
+def process_found_url(
+    driver,
+    profile_url: str,
+    found_url: Optional[str],
+    bandwidth: Optional[BandwidthAccountant] = None,
+    archive: Optional[PageArchive] = None,
+) -> Dict[str, Any]:
+    """
+    Second half of process_profile: extracts the data of an already found
+    LinkedIn URL (e.g. from a batched search).
     """
-    found_url = search_engine.search_linkedin_profile(driver, profile_url)
     if not found_url:
-        return {
-            "Original": profile_url,
-            "LinkedInURL": "",
-            "FullName": "",
-            "Location": "",
-            "IPChange": "not_found_or_captcha",
-        }
+        return empty_result(profile_url, "not_found_or_captcha")
 
     info = extract_linkedin_info(driver, found_url)
+    if bandwidth is not None:
+        bandwidth.collect(driver, "profile")
     if info["is_authwall"]:
-        return {
-            "Original": profile_url,
-            "LinkedInURL": found_url,
-            "FullName": "",
-            "Location": "",
-            "IPChange": "authwall",
-        }
+        return empty_result(profile_url, "authwall", found_url)
+    if archive is not None:
+        archive.put(found_url, PROFILE, driver.page_source, profile_url)
 
     return {
         "Original": profile_url,
@@ -63,85 +131,604 @@ def process_profile(driver, profile_url: str, search_engine) -> Dict[str, Any]:
     }
 
 
+def iter_chunks(batches: Iterable[List[Job]], size: int) -> Iterator[List[Job]]:
+    """
+    Chunks of at most size jobs. A chunk never spans two batches: the lease
+    of a claimed batch is only kept alive until the next one is claimed.
+    """
+    for batch in batches:
+        jobs = iter(batch)
+        while True:
+            chunk = list(islice(jobs, size))
+            if not chunk:
+                break
+            yield chunk
+
+
+class ProfileRunner:
+    """
+    State of one run: the driver and the proxy it goes through, the authwall
+    estimator, the parked (captcha) and hung jobs, and the sinks every result
+    is written to (CSV, results database, crawl state, Google Sheet, job
+    queue). main() builds it from the environment, then calls start(),
+    run() and close().
+    """
+
+    def __init__(
+        self,
+        proxy_manager,
+        search_engine,
+        bandwidth: BandwidthAccountant,
+        parked_jobs: ParkedJobQueue,
+        authwalls: AuthwallEstimator,
+        watchdog: HangWatchdog,
+        batcher: Optional[BatchSearcher] = None,
+        archive: Optional[PageArchive] = None,
+        context_pool=None,
+        profile_cache: Optional[ChromeProfileCache] = None,
+        job_queue=None,
+        worker_id: str = "",
+        lease_seconds: float = 300,
+        results_db: Optional[ResultsDatabase] = None,
+        crawl_state: Optional[CrawlStateStore] = None,
+        sheet_writer: Optional[BatchedSheetWriter] = None,
+        routes: Optional[Dict[str, str]] = None,
+        authwall_cooldown: float = 900,
+        captcha_cooldown: float = 300,
+        hang_cooldown: float = 600,
+        max_hang_retries: int = 2,
+    ):
+        self.proxy_manager = proxy_manager
+        self.search_engine = search_engine
+        self.bandwidth = bandwidth
+        self.parked_jobs = parked_jobs
+        self.authwalls = authwalls
+        self.watchdog = watchdog
+        self.batcher = batcher
+        self.archive = archive
+        self.context_pool = context_pool
+        self.profile_cache = profile_cache
+        self.job_queue = job_queue
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.results_db = results_db
+        self.crawl_state = crawl_state
+        self.sheet_writer = sheet_writer
+        # Input row -> route, completed as jobs are claimed
+        self.routes = routes if routes is not None else {}
+        self.authwall_cooldown = authwall_cooldown
+        self.captcha_cooldown = captcha_cooldown
+        self.hang_cooldown = hang_cooldown
+        self.max_hang_retries = max_hang_retries
+        self.driver = None
+        self.current_proxy: Optional[Dict] = None
+        self.hangs: Dict[str, int] = {}
+        self.hung_jobs: List[Job] = []
+        # Rows that already are a LinkedIn profile URL go straight to extraction
+        self.searches_avoided = 0
+
+    def start(self) -> None:
+        """Creates the first driver, without a proxy."""
+        self.driver = self.start_driver(None)
+
+    def record_result(self, job: Job, result: Dict[str, Any]) -> None:
+        # A job already completed by another node (after its lease
+        # expired here) is not written a second time
+        if self.job_queue is not None and job.id is not None:
+            if not self.job_queue.complete(job.id, self.worker_id, result):
+                print(f"{job.profile} was already completed, result dropped.")
+                self.bandwidth.settle("duplicate")
+                return
+        write_result(result)
+        self.bandwidth.settle(result["IPChange"])
+        if self.results_db is not None:
+            self.results_db.upsert(result)
+        if self.crawl_state is not None:
+            self.crawl_state.record(result)
+        if self.sheet_writer is not None:
+            self.sheet_writer.add(result)
+
+    def start_driver(self, proxy):
+        if self.context_pool is not None:
+            driver = self.context_pool.new_context(proxy)
+        else:
+            profile_cache = self.profile_cache
+            user_data_dir = profile_cache.acquire(proxy) if profile_cache else None
+            driver = setup_chrome_driver(
+                proxy=proxy, headless=False, user_data_dir=user_data_dir
+            )
+        self.bandwidth.bind(driver, proxy)
+        install_authwall_guard(driver)
+        return driver
+
+    def close_driver(self, driver) -> None:
+        self.bandwidth.unbind(driver)
+        try:
+            driver.quit()
+        except Exception as e:
+            print("Error quitting driver:", e)
+        if self.profile_cache is not None:
+            self.profile_cache.release(getattr(driver, "profile_dir", None))
+
+    def rotate(self, cooldown: float = 0) -> None:
+        if cooldown:
+            self.proxy_manager.cooldown(self.current_proxy, cooldown)
+        self.close_driver(self.driver)
+        self.current_proxy = self.proxy_manager.rotate_proxy()
+        self.driver = self.start_driver(self.current_proxy)
+
+    def handle_result(self, job: Job, result: Dict[str, Any]) -> None:
+        # Only loads of a profile page tell something about the proxy
+        if result["LinkedInURL"]:
+            self.authwalls.record(self.current_proxy, result["IPChange"] == "authwall")
+        if result["IPChange"] == "authwall":
+            print(
+                "Encountered authwall. Proxy authwall rate: "
+                f"{self.authwalls.rate(self.current_proxy):.0%}"
+            )
+            if self.authwalls.is_burned(self.current_proxy):
+                print("Proxy is burned. Rotating proxy...")
+                result["IPChange"] = "rotation"
+                self.record_result(job, result)
+                self.authwalls.reset(self.current_proxy)
+                self.rotate(cooldown=self.authwall_cooldown)
+                time.sleep(random.uniform(2, 5))
+                return
+
+        self.record_result(job, result)
+        time.sleep(random.uniform(2, 5))
+
+    def park_job(self, job: Job, challenge: CaptchaDetected) -> None:
+        print(f"{challenge} - parking {job.profile}.")
+        if self.parked_jobs.park(job, challenge):
+            self.bandwidth.settle("captcha")
+        else:
+            print(f"Giving up on {job.profile} after repeated captchas.")
+            self.record_result(job, empty_result(job.profile.strip(), "captcha"))
+
+    def handle_captcha(self, job: Job, challenge: CaptchaDetected) -> None:
+        self.park_job(job, challenge)
+        print("Rotating proxy after the captcha.")
+        self.rotate(cooldown=self.captcha_cooldown)
+
+    def handle_hang(self, job: Job, error: DriverHung) -> None:
+        self.bandwidth.settle("timeout")
+        self.hangs[job.profile] = self.hangs.get(job.profile, 0) + 1
+        if self.hangs[job.profile] > self.max_hang_retries:
+            print(f"{error} - giving up on {job.profile}.")
+            self.record_result(job, empty_result(job.profile.strip(), "timeout"))
+        else:
+            print(f"{error} - requeueing {job.profile} and replacing the driver.")
+            if self.job_queue is not None and job.id is not None:
+                self.job_queue.release(job.id, self.worker_id)
+            else:
+                self.hung_jobs.append(job)
+        self.rotate(cooldown=self.hang_cooldown)
+
+    def retry_parked(self, ready: List[Tuple[Job, Optional[str]]]) -> None:
+        for job, token in ready:
+            print(f"Retrying parked profile: {job.profile}")
+            try:
+                with self.watchdog.watch(self.driver):
+                    result = process_profile(
+                        self.driver,
+                        job.profile.strip(),
+                        self.search_engine,
+                        captcha_token=token,
+                        bandwidth=self.bandwidth,
+                        archive=self.archive,
+                    )
+            except CaptchaDetected as challenge:
+                self.handle_captcha(job, challenge)
+                continue
+            except DriverHung as error:
+                self.parked_jobs.forget(job)
+                self.handle_hang(job, error)
+                continue
+            self.parked_jobs.forget(job)
+            self.handle_result(job, result)
+
+    def process_job(
+        self,
+        job: Job,
+        direct: bool,
+        found_urls: Optional[Dict[str, Optional[str]]] = None,
+    ) -> None:
+        """found_urls: results of a batched lookup covering this job."""
+        profile_url = job.profile.strip()
+        print(f"Processing profile: {profile_url}")
+        try:
+            with self.watchdog.watch(self.driver):
+                if direct:
+                    self.searches_avoided += 1
+                    result = process_found_url(
+                        self.driver,
+                        profile_url,
+                        linkedin_profile_url(profile_url),
+                        self.bandwidth,
+                        self.archive,
+                    )
+                elif found_urls is not None:
+                    result = process_found_url(
+                        self.driver,
+                        profile_url,
+                        found_urls.get(profile_url),
+                        self.bandwidth,
+                        self.archive,
+                    )
+                else:
+                    result = process_profile(
+                        self.driver,
+                        profile_url,
+                        self.search_engine,
+                        bandwidth=self.bandwidth,
+                        archive=self.archive,
+                    )
+        except CaptchaDetected as challenge:
+            self.handle_captcha(job, challenge)
+            return
+        except DriverHung as error:
+            self.handle_hang(job, error)
+            return
+        self.handle_result(job, result)
+
+    def lookup_batch(self, chunk: List[Job], queries: List[str]):
+        """
+        Looks up the names of a chunk with batched SERPs. Returns the found
+        URLs (None if the driver hung) and the chunk without the jobs parked
+        after a captcha.
+        """
+        batcher = self.batcher
+        found_urls: Optional[Dict[str, Optional[str]]] = {}
+        try:
+            # One SERP plus a fallback search per unmatched name: the
+            # budget grows with the number of names looked up
+            budget = self.watchdog.budget * len(queries)
+            with self.watchdog.watch(self.driver, budget=budget):
+                found_urls = batcher.lookup(self.driver, queries)
+                # Shared by the whole chunk, not one profile's attempt
+                self.bandwidth.collect(self.driver, "search")
+        except DriverHung as error:
+            # Each profile of the chunk is searched on its own instead
+            print(f"{error} during a batched lookup - replacing the driver.")
+            found_urls = None
+            self.rotate(cooldown=self.hang_cooldown)
+        self.bandwidth.settle("batched", attempt=False)
+
+        # A captcha stopped the lookup: park the jobs it left unresolved
+        # and rotate once, before any of them touches another proxy.
+        if batcher.captchas:
+            challenged = [
+                job for job in chunk if job.profile.strip() in batcher.captchas
+            ]
+            for job in challenged:
+                self.park_job(job, batcher.captchas[job.profile.strip()])
+            batcher.captchas.clear()
+            print("Rotating proxy after the captcha.")
+            self.rotate(cooldown=self.captcha_cooldown)
+            chunk = [job for job in chunk if job not in challenged]
+        return found_urls, chunk
+
+    def process_chunk(self, chunk: List[Job]) -> None:
+        chunk = [job for job in chunk if job.profile.strip()]
+        unknown = [job.profile for job in chunk if job.profile not in self.routes]
+        self.routes.update(zip(unknown, classify_inputs(unknown)))
+        direct = {job for job in chunk if self.routes[job.profile] == ROUTE_LINKEDIN}
+        found_urls = None
+        if self.batcher is not None:
+            found_urls = {}
+            queries = [job.profile.strip() for job in chunk if job not in direct]
+            if queries:
+                found_urls, chunk = self.lookup_batch(chunk, queries)
+
+        for job in chunk:
+            self.process_job(job, job in direct, found_urls)
+
+        self.retry_parked(self.parked_jobs.pop_ready())
+
+    def parked_job_ids(self) -> List[int]:
+        return [job.id for job in self.parked_jobs.jobs() if job.id is not None]
+
+    def run(self, job_batches: Iterable[List[Job]]) -> None:
+        """Processes every job, then the hung and parked ones."""
+        # Parked jobs outlive the lease of their batch: keep them leased
+        # until they are retried or given up
+        parked_leases = nullcontext()
+        if self.job_queue is not None:
+            parked_leases = self.job_queue.keep_alive(
+                self.worker_id, self.parked_job_ids, self.lease_seconds
+            )
+        with parked_leases:
+            batch_size = self.batcher.batch_size if self.batcher else 1
+            for chunk in iter_chunks(job_batches, batch_size):
+                self.process_chunk(chunk)
+
+            # Profiles requeued after a hang, with a fresh driver
+            while self.hung_jobs:
+                job = self.hung_jobs.pop(0)
+                self.process_job(job, self.routes[job.profile] == ROUTE_LINKEDIN)
+
+            # Finish the parked jobs before closing
+            parked_jobs = self.parked_jobs
+            while parked_jobs.pending():
+                ready = parked_jobs.wait_ready(timeout=parked_jobs.cooldown + 180)
+                if not ready:
+                    break
+                self.retry_parked(ready)
+            for job in parked_jobs.abandon():
+                self.record_result(job, empty_result(job.profile.strip(), "captcha"))
+
+    def close(self) -> None:
+        """Closes the driver and the captcha queue, prints the run's stats."""
+        self.parked_jobs.close()
+        print("Captcha queue:", self.parked_jobs.stats)
+        print(f"Searches avoided for direct LinkedIn URLs: {self.searches_avoided}")
+        print(f"Hung drivers killed by the watchdog: {self.watchdog.kills}")
+
+        self.close_driver(self.driver)
+        if self.context_pool is not None:
+            self.context_pool.close()
+
+
 def main():
     """
     Main script:
       - Reads the list of profiles (CSV or Google Sheets),
       - Creates a driver with the current proxy (once),
       - Processes each profile, immediately appending the result to CSV,
-      - When 5 consecutive authwalls (redirect to the authorization page) occur,
+      - When the authwall rate (redirects to the authorization page) shows
+        that the proxy is burned (see authwall.AuthwallEstimator),
         the proxy rotation occurs:
         close the driver, write a line with IPChange = "rotation"
         and create a new driver.
+    When JOB_QUEUE is set, profiles are distributed through a shared queue:
+    every node seeds it from its source (duplicates are ignored) and claims
+    batches with leases. Pure workers use SOURCE_TYPE=queue.
+    DRY_RUN=1 stops after loading/seeding the profiles.
+    The profiles are processed by a ProfileRunner built from the environment.
     """
     # 1. Data source
     source_type = os.environ.get("SOURCE_TYPE", "csv").lower()
     profiles: List[str] = []
-    if source_type == "csv":
+    if source_type == "queue":
+        pass
+    elif source_type == "csv":
         csv_path = os.environ.get("CSV_PATH", "ProfilesListExample.csv")
         print(f"Reading profiles from CSV: {csv_path}")
-        profiles = read_profiles_csv(csv_path)
+        profiles = resolve("reader", "csv")(csv_path)
     elif source_type == "gsheet":
         sheet_url = os.environ.get("GSHEET_URL", "<YOUR_SHEET_URL>")
         creds_file = os.environ.get("GSHEET_CREDS", "service_account.json")
         print(f"Reading profiles from Google Sheet: {sheet_url}")
-        profiles = read_profiles_gsheet(sheet_url, creds_file)
+        profiles = resolve("reader", "gsheet")(sheet_url, creds_file)
     else:
         raise ValueError(
-            f"Unknown SOURCE_TYPE={source_type}. Must be 'csv' or 'gsheet'."
+            f"Unknown SOURCE_TYPE={source_type}. "
+            "Must be 'csv', 'gsheet' or 'queue'."
         )
 
     print(f"Loaded {len(profiles)} profile(s).")
+    # Route of every input row, classified once (jobs claimed from a queue
+    # seeded by other nodes are classified when claimed)
+    routes: Dict[str, str] = {}
+    if profiles:
+        profile_routes = classify_inputs(profiles)
+        routes = dict(zip(profiles, profile_routes))
+        counts = route_counts(profile_routes)
+        print(
+            f"Input routes: {counts[ROUTE_LINKEDIN]} LinkedIn URL(s) without "
+            f"search, {counts[ROUTE_URL]} other URL(s), {counts[ROUTE_NAME]} name(s)."
+        )
 
-    # 2. Initialize the proxy manager
-    proxy_api_key = os.environ.get("PROXY_API_KEY", "REPLACE_WITH_YOUR_KEY")
-    proxy_manager = WebshareProxyManager(api_key=proxy_api_key)
+    # With CRAWL_STATE, fresh profiles are skipped and the rest ordered
+    # by staleness (incremental re-crawl).
+    crawl_state = None
+    crawl_state_path = os.environ.get("CRAWL_STATE")
+    if crawl_state_path:
+        crawl_state = CrawlStateStore(
+            crawl_state_path,
+            base_interval=float(os.environ.get("RECRAWL_DAYS", "30")) * DAY,
+            max_interval=float(os.environ.get("RECRAWL_MAX_DAYS", "180")) * DAY,
+            retry_interval=float(os.environ.get("RECRAWL_RETRY_DAYS", "1")) * DAY,
+        )
+        profiles, skipped = crawl_state.plan(profiles)
+        print(f"Crawl state: {len(profiles)} due, {skipped} fresh profile(s) skipped.")
 
-    # 3. Select the search engine
-    search_engine_name = os.environ.get("SEARCH_ENGINE", "google")
-    print(f"Using search engine: {search_engine_name}")
-    search_engine = get_search_engine(search_engine_name)
+    job_queue = None
+    worker_id = os.environ.get("WORKER_ID") or default_worker_id()
+    lease_seconds = float(os.environ.get("JOB_LEASE_SECONDS", "300"))
+    job_batches: Iterable[List[Job]] = [[Job(None, profile) for profile in profiles]]
+    queue_url = os.environ.get("JOB_QUEUE")
+    if queue_url:
+        # JOB_RUN: id shared by the nodes of one run; a new id crawls again
+        job_run = os.environ.get("JOB_RUN", "")
+        job_queue = get_job_queue(queue_url, job_run)
+        added = job_queue.enqueue(profiles)
+        print(
+            f"Job queue {queue_url} (run '{job_run}'): {added} new job(s), "
+            f"{job_queue.counts()}"
+        )
+        job_batches = job_queue.iter_batches(
+            worker_id,
+            batch_size=int(os.environ.get("JOB_BATCH_SIZE", "10")),
+            lease_seconds=lease_seconds,
+        )
+    elif source_type == "queue":
+        raise ValueError("SOURCE_TYPE=queue requires JOB_QUEUE to be set.")
 
-    # 4. Create a driver once with the current proxy
-    driver = setup_chrome_driver(proxy=None, headless=False)
+    if os.environ.get("DRY_RUN", "0") == "1":
+        print("Dry run: no browser started.")
+        return
 
-    authwall_count = 0
-    input("Press Enter when ready to continue...")
+    results_db = None
+    results_db_path = os.environ.get("RESULTS_DB")
+    if results_db_path:
+        results_db = ResultsDatabase(results_db_path)
+        print(f"Upserting results into {results_db_path}")
 
-    for profile_url in profiles:
-        profile_url = profile_url.strip()
-        if not profile_url:
-            continue
-        print(f"Processing profile: {profile_url}")
-        result = process_profile(driver, profile_url, search_engine)
+    sheet_writer = None
+    results_sheet_url = os.environ.get("RESULTS_GSHEET_URL")
+    if results_sheet_url:
+        worksheet = open_worksheet(
+            results_sheet_url,
+            os.environ.get("GSHEET_CREDS", "service_account.json"),
+            os.environ.get("RESULTS_GSHEET_WORKSHEET", "results"),
+        )
+        sheet_writer = BatchedSheetWriter(
+            worksheet,
+            FIELDNAMES,
+            flush_rows=int(os.environ.get("GSHEET_FLUSH_ROWS", "50")),
+            flush_interval=float(os.environ.get("GSHEET_FLUSH_SECONDS", "30")),
+        )
+        print(f"Writing results to Google Sheet: {results_sheet_url}")
 
-        if result["IPChange"] == "authwall":
-            authwall_count += 1
-            print(f"Encountered authwall. Count: {authwall_count}")
-            if authwall_count >= 5:
-                print("Reached 5 consecutive authwalls. Rotating proxy...")
-                result["IPChange"] = "rotation"
-                write_result(result)
-                try:
-                    driver.quit()
-                except Exception as e:
-                    print("Error quitting driver:", e)
-                new_proxy = proxy_manager.rotate_proxy()
-                driver = setup_chrome_driver(proxy=new_proxy, headless=False)
-                authwall_count = 0
-                time.sleep(random.uniform(2, 5))
-                continue
-        else:
-            authwall_count = 0
+    try:
+        # Proxy traffic per proxy, domain, stage and outcome (see bandwidth.py)
+        bandwidth = BandwidthAccountant(
+            price_per_gb=float(os.environ.get("PROXY_PRICE_PER_GB", "0")),
+            export_path=os.environ.get(
+                "BANDWIDTH_REPORT_PATH", "bandwidth_report.json"
+            ),
+            export_interval=float(os.environ.get("BANDWIDTH_REPORT_INTERVAL", "300")),
+        )
 
-        write_result(result)
-        time.sleep(random.uniform(2, 5))
+        # Page sources kept for offline re-extraction (python page_archive.py)
+        archive = None
+        archive_dir = os.environ.get("PAGE_ARCHIVE")
+        if archive_dir:
+            archive = PageArchive(archive_dir)
+            print(f"Archiving fetched pages in {archive_dir}")
 
-    try:
-        driver.quit()
-    except Exception as e:
-        print("Error quitting driver:", e)
+        # 2. Initialize the proxy manager
+        proxy_api_key = os.environ.get("PROXY_API_KEY", "REPLACE_WITH_YOUR_KEY")
+        proxy_manager = resolve("proxy", "webshare")(api_key=proxy_api_key)
+
+        # 3. Select the search engine
+        search_engine_name = os.environ.get("SEARCH_ENGINE", "google")
+        print(f"Using search engine: {search_engine_name}")
+        search_engine = resolve("engine", search_engine_name, default="google")()
+
+        # SERP_BATCH_SIZE > 1 looks up several names with one SERP load
+        batch_size = int(os.environ.get("SERP_BATCH_SIZE", "1"))
+        batcher = None
+        if batch_size > 1 and search_engine.supports_batch:
+            batcher = BatchSearcher(search_engine, batch_size=batch_size)
+        elif batch_size > 1:
+            print(f"{search_engine_name} does not support batched search.")
+
+        # 4. Create a driver once with the current proxy
+        # With PROFILE_CACHE_DIR every proxy gets a persistent Chrome profile
+        # (consent cookies, HTTP cache) reused on the next rotation to it.
+        profile_cache = None
+        profile_cache_dir = os.environ.get("PROFILE_CACHE_DIR")
+        if profile_cache_dir:
+            profile_cache = ChromeProfileCache(
+                profile_cache_dir,
+                max_profiles=int(os.environ.get("PROFILE_CACHE_MAX_PROFILES", "20")),
+                max_bytes=int(os.environ.get("PROFILE_CACHE_MAX_MB", "2048")) * 1024**2,
+            )
+
+        # With BROWSER_CONTEXTS=1 one Chrome process hosts every session as an
+        # isolated browser context; rotating opens a context instead of a browser.
+        # BROWSER_BACKEND=cdp does the same over a DevTools websocket, without
+        # chromedriver (CDP_URL attaches to an already running Chrome).
+        context_pool = None
+        if os.environ.get("BROWSER_BACKEND", "selenium") == "cdp":
+            from cdp_browser import CdpBrowser  # imports asyncio
+
+            context_pool = CdpBrowser(
+                headless=os.environ.get("CDP_HEADLESS", "0") == "1",
+                ws_url=os.environ.get("CDP_URL") or None,
+            )
+        elif os.environ.get("BROWSER_CONTEXTS", "0") == "1":
+            # Contexts can't send proxy credentials, which every Webshare entry
+            # carries: refuse the mode unless the proxies authorize this IP.
+            if os.environ.get("PROXY_IP_AUTH", "0") != "1":
+                raise ValueError(
+                    "BROWSER_CONTEXTS=1 can't authenticate to proxies: authorize "
+                    "this machine's IP at the proxy provider and set PROXY_IP_AUTH=1."
+                )
+            context_pool = BrowserContextPool(
+                setup_chrome_driver(proxy=None, headless=False), ip_auth=True
+            )
+
+        # Captchas don't block the run: the job is parked, the proxy cools down
+        # and the job is retried later (with a token if TWOCAPTCHA_API_KEY is set).
+        twocaptcha_key = os.environ.get("TWOCAPTCHA_API_KEY")
+        parked_jobs = ParkedJobQueue(
+            solver=TwoCaptchaSolver(twocaptcha_key) if twocaptcha_key else None,
+            cooldown=float(os.environ.get("CAPTCHA_RETRY_DELAY", "60")),
+        )
+
+        # Rotate as soon as the proxy's authwall rate shows it is burned
+        authwalls = AuthwallEstimator(
+            healthy_rate=float(os.environ.get("AUTHWALL_HEALTHY_RATE", "0.1")),
+            burned_rate=float(os.environ.get("AUTHWALL_BURNED_RATE", "0.7")),
+            alpha=float(os.environ.get("AUTHWALL_ALPHA", "0.05")),
+        )
+
+        # A profile running past PROFILE_TIMEOUT (e.g. a proxy stalled
+        # mid-response) gets its driver killed; the profile is requeued and the
+        # driver replaced behind another proxy.
+        watchdog = HangWatchdog(float(os.environ.get("PROFILE_TIMEOUT", "180")))
+
+        runner = ProfileRunner(
+            proxy_manager,
+            search_engine,
+            bandwidth,
+            parked_jobs,
+            authwalls,
+            watchdog,
+            batcher=batcher,
+            archive=archive,
+            context_pool=context_pool,
+            profile_cache=profile_cache,
+            job_queue=job_queue,
+            worker_id=worker_id,
+            lease_seconds=lease_seconds,
+            results_db=results_db,
+            crawl_state=crawl_state,
+            sheet_writer=sheet_writer,
+            routes=routes,
+            authwall_cooldown=float(os.environ.get("AUTHWALL_COOLDOWN", "900")),
+            captcha_cooldown=float(os.environ.get("CAPTCHA_COOLDOWN", "300")),
+            hang_cooldown=float(os.environ.get("HANG_COOLDOWN", "600")),
+            max_hang_retries=int(os.environ.get("HANG_RETRIES", "2")),
+        )
+        runner.start()
+
+        if sys.stdin.isatty():
+            input("Press Enter when ready to continue...")
+
+        runner.run(job_batches)
+        runner.close()
+
+        if archive is not None:
+            print("Page archive:", archive.stats())
+            archive.close()
+
+        bandwidth.export()
+        report = bandwidth.report()
+        print(
+            f"Bandwidth: {report['bytes'] / 1024**2:.1f} MB in {report['requests']} "
+            f"requests, cost {report['cost']}, per successful profile "
+            f"{report['cost_per_success']}. Report: {bandwidth.export_path}"
+        )
 
+        selector_registry = get_selector_registry()
+        print("Selector probes per lookup:", selector_registry.probes_per_field())
+        selector_registry.save()
+        if batcher is not None:
+            print("Batched search:", batcher.report())
+        if crawl_state is not None:
+            crawl_state.close()
+        if results_db is not None:
+            print("Results database status:", results_db.status_counts())
+            results_db.close()
+    finally:
+        # Rows still pending are not lost when the run fails
+        if sheet_writer is not None:
+            sheet_writer.close()
     print("Done. Results appended to", OUTPUT_FILE)
 
 
@@ -0,0 +1,282 @@
+# page_archive.py
+import csv
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from url_utils import canonical_url
+
+PROFILE = "profile"
+SERP_PREFIX = "serp:"  # followed by the engine name
+
+
+def _compressor(level: int):
+    """(suffix, compress) with zstd if installed, zlib otherwise."""
+    try:
+        import zstandard
+    except ImportError:
+        return ".zz", lambda data: zlib.compress(data, min(level, 9))
+    return ".zst", zstandard.ZstdCompressor(level=level).compress
+
+
+def _decompress(path: str, data: bytes) -> bytes:
+    if path.endswith(".zst"):
+        import zstandard
+
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+class PageArchive:
+    """
+    Append-only archive of fetched pages (profile pages and SERPs).
+    Page sources are stored compressed under objects/ by the SHA-256 of the
+    HTML, so identical pages are stored once and stored files never change.
+    index.db (SQLite) records every fetch: canonical key, URL, kind
+    ("profile" or "serp:<engine>"), the input row it was fetched for and
+    the digest. Profile pages are keyed by canonical profile URL, SERPs by
+    the canonical input they searched for.
+    """
+
+    def __init__(self, root: str, level: int = 9):
+        self.root = root
+        self.suffix, self._compress = _compressor(level)
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(
+            os.path.join(root, "index.db"), timeout=30, check_same_thread=False
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                key TEXT NOT NULL,
+                url TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                original TEXT NOT NULL DEFAULT '',
+                digest TEXT NOT NULL,
+                object TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS pages_key ON pages (key, fetched_at);
+            CREATE INDEX IF NOT EXISTS pages_original ON pages (original);
+            """
+        )
+
+    def _object_path(self, digest: str, suffix: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], digest + suffix)
+
+    def _find_object(self, digest: str) -> Optional[str]:
+        for suffix in (".zst", ".zz"):
+            path = self._object_path(digest, suffix)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def put(self, url: str, kind: str, html: str, original: str = "") -> str:
+        """Archives a page source, returns its digest."""
+        data = html.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._find_object(digest)
+        if path is None:
+            path = self._object_path(digest, self.suffix)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(self._compress(data))
+            os.replace(tmp_path, path)
+
+        key = canonical_url(original if kind.startswith(SERP_PREFIX) else url)
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO pages "
+                "(key, url, kind, original, digest, object, size, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    url,
+                    kind,
+                    original,
+                    digest,
+                    os.path.relpath(path, self.root),
+                    len(data),
+                    time.time(),
+                ),
+            )
+        return digest
+
+    def read(self, obj: str) -> str:
+        """HTML of an archived object (path relative to the archive root)."""
+        return read_object(self.root, obj)
+
+    def history(self, url: str) -> List[Dict[str, Any]]:
+        """Every archived fetch of a canonical URL/input, oldest first."""
+        cur = self.conn.execute(
+            "SELECT * FROM pages WHERE key = ? ORDER BY fetched_at",
+            (canonical_url(url),),
+        )
+        columns = [c[0] for c in cur.description]
+        return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+    def latest(self) -> Iterator[Dict[str, Any]]:
+        """
+        Most recent profile page and SERP archived for every input row;
+        rows are the same input when their canonical forms are equal.
+        """
+        latest: Dict[Tuple[str, bool], Dict[str, Any]] = {}
+        cur = self.conn.execute("SELECT * FROM pages ORDER BY id")
+        columns = [c[0] for c in cur.description]
+        for row in cur:
+            entry = dict(zip(columns, row))
+            latest[(canonical_url(entry["original"]), entry["kind"] == PROFILE)] = entry
+        return iter(latest.values())
+
+    def stats(self) -> Dict[str, int]:
+        pages, objects, size = self.conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT digest), "
+            "(SELECT SUM(size) FROM (SELECT DISTINCT digest, size FROM pages)) "
+            "FROM pages"
+        ).fetchone()
+        stored = 0
+        for directory, _, files in os.walk(os.path.join(self.root, "objects")):
+            stored += sum(os.path.getsize(os.path.join(directory, f)) for f in files)
+        return {
+            "pages": pages,
+            "objects": objects,
+            "html_bytes": size or 0,
+            "stored_bytes": stored,
+        }
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def read_object(root: str, obj: str) -> str:
+    path = os.path.join(root, obj)
+    with open(path, "rb") as f:
+        return _decompress(path, f.read()).decode("utf-8")
+
+
+################################################
+# Offline re-extraction
+################################################
+
+
+def _extract(task: Tuple[str, str, str, str]) -> Tuple[str, Optional[Dict]]:
+    """
+    Runs in a worker process: the parser (profile pages) or the engine's
+    extract_linkedin_url (SERPs) on one archived page.
+    """
+    from static_page import StaticPage
+
+    root, obj, kind, url = task
+    page = StaticPage(read_object(root, obj), url)
+    if kind == PROFILE:
+        from parser_logic import parse_profile_page
+
+        return kind, parse_profile_page(page, url)
+
+    from registry import resolve
+
+    engine = resolve("engine", kind[len(SERP_PREFIX) :])()
+    return kind, {"found_url": engine.extract_linkedin_url(page)}
+
+
+def reextract(
+    archive: PageArchive, workers: Optional[int] = None, chunksize: int = 32
+) -> Iterator[Dict[str, Any]]:
+    """
+    Re-extracts a result row (same columns as main's CSV) per archived input
+    from its latest SERP and profile page, in parallel across processes.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    entries = list(archive.latest())
+    tasks = [
+        (archive.root, entry["object"], entry["kind"], entry["url"])
+        for entry in entries
+    ]
+    rows: Dict[str, Dict[str, Any]] = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for entry, (kind, info) in zip(
+            entries, executor.map(_extract, tasks, chunksize=chunksize)
+        ):
+            row = rows.setdefault(
+                canonical_url(entry["original"]),
+                {
+                    "Original": entry["original"],
+                    "LinkedInURL": "",
+                    "FullName": "",
+                    "Location": "",
+                    "IPChange": "not_found_or_captcha",
+                },
+            )
+            if kind == PROFILE:
+                row["LinkedInURL"] = entry["url"]
+                row["FullName"] = info["name"] or ""
+                row["Location"] = info["location"] or ""
+                row["IPChange"] = "authwall" if info["is_authwall"] else ""
+            elif row["IPChange"] == "not_found_or_captcha" and info["found_url"]:
+                # Found by the search, profile page not archived
+                row["LinkedInURL"] = info["found_url"]
+                row["IPChange"] = "not_archived"
+    return iter(rows.values())
+
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(
+        description="Inspect the page archive or re-extract results from it."
+    )
+    arg_parser.add_argument("archive", help="Archive directory (PAGE_ARCHIVE)")
+    sub = arg_parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="Pages, objects and compression")
+    history_cmd = sub.add_parser("history", help="Archived fetches of a URL/input")
+    history_cmd.add_argument("url")
+    reextract_cmd = sub.add_parser(
+        "reextract", help="Run the extraction over the archive, write a CSV"
+    )
+    reextract_cmd.add_argument("output")
+    reextract_cmd.add_argument("--workers", type=int, default=None)
+    reextract_cmd.add_argument(
+        "--results-db", help="Also upsert the rows into this results database"
+    )
+    args = arg_parser.parse_args()
+
+    archive = PageArchive(args.archive)
+    if args.command == "stats":
+        print(archive.stats())
+    elif args.command == "history":
+        for entry in archive.history(args.url):
+            print(
+                time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["fetched_at"])),
+                entry["kind"],
+                entry["url"],
+                entry["digest"][:12],
+            )
+    else:
+        from results_db import COLUMNS, ResultsDatabase
+
+        start = time.perf_counter()
+        rows = list(reextract(archive, workers=args.workers))
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(COLUMNS))
+            writer.writeheader()
+            writer.writerows(rows)
+        if args.results_db:
+            # Only rows re-extracted from a profile page replace stored results
+            db = ResultsDatabase(args.results_db)
+            db.upsert_many(row for row in rows if not row["IPChange"])
+            db.close()
+        print(
+            f"Re-extracted {len(rows)} row(s) to {args.output} "
+            f"in {time.perf_counter() - start:.1f}s"
+        )
+    archive.close()
@@ -1,21 +1,31 @@
 # parser_logic.py
 import time
 import random
-from selenium.webdriver.common.by import By
-from selenium.common.exceptions import NoSuchElementException
 
+from authwall import is_authwall_url
+from browser import BrowserHandle
+from selector_registry import get_selector_registry
 
-def extract_linkedin_info(driver, url: str) -> dict:
+
+def extract_linkedin_info(driver: BrowserHandle, url: str) -> dict:
     """
     Extracts LinkedIn profile information.
     """
+    from selenium.common.exceptions import TimeoutException
+
     info = {}
 
-    driver.get(url)
-    time.sleep(random.uniform(1, 2))  # waiting for page loading
+    try:
+        driver.get(url)
+    except TimeoutException:
+        # Past PAGE_LOAD_TIMEOUT: keep what has rendered so far
+        print(f"Page load timed out, stopping it: {url}")
+        driver.execute_script("window.stop();")
 
-    current_url = driver.current_url.lower()
-    is_authwall = "authwall" in current_url
+    # The redirect to the authwall is known as soon as get() returns (and with
+    # install_authwall_guard the authwall page itself is never downloaded),
+    # so it is checked before waiting for the profile to render.
+    is_authwall = is_authwall_url(driver.current_url)
 
     if is_authwall:
         info = {
@@ -28,64 +38,24 @@ def extract_linkedin_info(driver, url: str) -> dict:
         print("The page is under the authwall.")
         return info
 
-    name = None
-    location = None
-    current_position = None
-
-    name_selectors = [
-        "h1.text-heading-xlarge",
-        "h1.top-card-layout__title",
-        ".pv-text-details__left-panel h1",
-        "h1",
-    ]
-    for sel in name_selectors:
-        try:
-            el = driver.find_element(By.CSS_SELECTOR, sel)
-            text = el.text.strip()
-            if text:
-                name = text
-                break
-        except NoSuchElementException:
-            continue
+    time.sleep(random.uniform(1, 2))  # waiting for page loading
 
-    location_selectors = [
-        ".top-card-layout__card span.top-card__subline-item",
-        "span.location",
-        ".pv-text-details__left-panel div.text-body-small",
-        ".profile-info-subheader .not-first-middot span:first-child",
-    ]
-    for sel in location_selectors:
-        try:
-            el = driver.find_element(By.CSS_SELECTOR, sel)
-            text = el.text.strip()
-            if text:
-                location = text
-                break
-        except NoSuchElementException:
-            continue
+    info = parse_profile_page(driver, url)
+    print("Profile information:", info)
+    return info
 
-    if not is_authwall:
-        position_selectors = [
-            ".experience-item__title",
-            ".top-card-layout__headline",
-            ".pv-text-details__left-panel div.text-body-medium.break-words",
-        ]
-        for sel in position_selectors:
-            try:
-                el = driver.find_element(By.CSS_SELECTOR, sel)
-                text = el.text.strip()
-                if text:
-                    current_position = text
-                    break
-            except NoSuchElementException:
-                continue
 
-    info = {
+def parse_profile_page(driver: BrowserHandle, url: str) -> dict:
+    """
+    Extracts the profile information from the page the driver shows,
+    without navigating (also runs on archived pages, see page_archive).
+    """
+    # Selectors are tried in order of their historical hit rate
+    registry = get_selector_registry()
+    return {
         "url": url,
-        "name": name,
-        "location": location,
-        "current_position": current_position,
-        "is_authwall": is_authwall,
+        "name": registry.find_text(driver, "profile.name"),
+        "location": registry.find_text(driver, "profile.location"),
+        "current_position": registry.find_text(driver, "profile.position"),
+        "is_authwall": is_authwall_url(driver.current_url),
     }
-    print("Profile information:", info)
-    return info
@@ -0,0 +1,115 @@
+# profile_cache.py
+import hashlib
+import os
+import shutil
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+LAST_USED_FILE = ".last_used"
+
+
+def proxy_key(proxy: Optional[Dict]) -> str:
+    """Stable directory name for a proxy ("direct" without a proxy)."""
+    if not proxy:
+        return "direct"
+    raw = (
+        f"{proxy.get('proxy_address')}:{proxy.get('port')}:{proxy.get('username')}"
+    )
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def has_consent(profile_dir: Optional[str], engine_name: str) -> bool:
+    """True if cookies of the engine were already accepted in this profile."""
+    if not profile_dir:
+        return False
+    return os.path.exists(os.path.join(profile_dir, f".consent-{engine_name}"))
+
+
+def mark_consent(profile_dir: Optional[str], engine_name: str) -> None:
+    if not profile_dir:
+        return
+    with open(os.path.join(profile_dir, f".consent-{engine_name}"), "w") as f:
+        f.write(str(time.time()))
+
+
+class ChromeProfileCache:
+    """
+    Cache of Chrome user-data directories, one per proxy.
+    Consent cookies and the HTTP cache survive driver restarts on the same
+    proxy, so search engines don't show the consent dialog again and the
+    browser doesn't look freshly installed.
+    Least recently used profiles are removed when there are more than
+    max_profiles or they take more than max_bytes on disk.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        max_profiles: int = 20,
+        max_bytes: int = 2 * 1024**3,
+    ):
+        self.root = root
+        self.max_profiles = max_profiles
+        self.max_bytes = max_bytes
+        self.in_use: Set[str] = set()
+        self.lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def acquire(self, proxy: Optional[Dict]) -> str:
+        """Returns the profile directory for the proxy and marks it used."""
+        path = os.path.join(self.root, proxy_key(proxy))
+        with self.lock:
+            os.makedirs(path, exist_ok=True)
+            with open(os.path.join(path, LAST_USED_FILE), "w") as f:
+                f.write(str(time.time()))
+            self.in_use.add(path)
+            self._evict()
+        return path
+
+    def release(self, path: Optional[str]) -> None:
+        """Marks the profile as no longer used by a running browser."""
+        if not path:
+            return
+        with self.lock:
+            self.in_use.discard(path)
+            self._evict()
+
+    def _profiles(self) -> List[Tuple[float, str]]:
+        profiles = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if not os.path.isdir(path):
+                continue
+            try:
+                last_used = os.path.getmtime(os.path.join(path, LAST_USED_FILE))
+            except OSError:
+                last_used = os.path.getmtime(path)
+            profiles.append((last_used, path))
+        return sorted(profiles)
+
+    def _evict(self) -> None:
+        profiles = self._profiles()
+        sizes = {path: _dir_size(path) for _, path in profiles}
+        total = sum(sizes.values())
+        count = len(profiles)
+        for _, path in profiles:
+            if count <= self.max_profiles and total <= self.max_bytes:
+                break
+            if path in self.in_use:
+                continue
+            print(f"Evicting browser profile {path}")
+            shutil.rmtree(path, ignore_errors=True)
+            total -= sizes[path]
+            count -= 1
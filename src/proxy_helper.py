@@ -1,44 +1,206 @@
 # proxy_helper.py
+import hashlib
+import json
+import os
 import random
-import requests
-from typing import Dict, List, Optional
+import threading
+import time
+from typing import Callable, Dict, List, Optional
 
 BASE_URL = "https://proxy.webshare.io/api/v2"
+PROXY_LIST_TTL = float(os.environ.get("PROXY_LIST_TTL", "600"))
+PROXY_CACHE_DIR = os.environ.get("PROXY_CACHE_DIR", ".proxy_cache")
 
 
-class WebshareProxyManager:
+def _proxy_id(proxy: Dict) -> str:
+    return f"{proxy['proxy_address']}:{proxy['port']}"
+
+
+class ProxyCooldownMixin:
+    """
+    Lets a manager put a proxy on cooldown (e.g. after a captcha):
+    random picks skip it until the cooldown expires, unless every proxy
+    is cooling down.
+    """
+
+    def cooldown(self, proxy: Optional[Dict], seconds: float) -> None:
+        if not proxy:
+            return
+        if not hasattr(self, "cooldowns"):
+            self.cooldowns: Dict[str, float] = {}
+        self.cooldowns[_proxy_id(proxy)] = time.time() + seconds
+
+    def _choose(self, proxies: List[Dict]) -> Dict:
+        now = time.time()
+        cooldowns = getattr(self, "cooldowns", {})
+        available = [p for p in proxies if cooldowns.get(_proxy_id(p), 0) <= now]
+        return random.choice(available or proxies)
+
+
+class ProxyListProvider:
+    """
+    Long-lived source of a proxy list shared by all manager instances:
+    - one pooled requests.Session for every download,
+    - the list is kept in memory and in a JSON file on disk with a TTL,
+    - a background thread refreshes it before it expires.
+    Rotations read the in-memory list and never wait for the network,
+    except for the very first fetch when there is no cache at all.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        fetch: Callable[..., List[Dict]],
+        ttl: float = PROXY_LIST_TTL,
+        cache_dir: Optional[str] = PROXY_CACHE_DIR,
+    ):
+        self.key = key
+        self.fetch = fetch
+        self.ttl = ttl
+        self.cache_path = None
+        if cache_dir:
+            digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+            self.cache_path = os.path.join(cache_dir, f"{digest}.json")
+        self.proxies: List[Dict] = []
+        self.fetched_at = 0.0
+        # Shared by all managers of this list, see ProxyCooldownMixin
+        self.cooldowns: Dict[str, float] = {}
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.session = None
+        self.thread: Optional[threading.Thread] = None
+        self._load_cache()
+
+    def _get_session(self):
+        if self.session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            self.session = requests.Session()
+            self.session.mount("https://", HTTPAdapter(pool_maxsize=4))
+        return self.session
+
+    def _load_cache(self) -> None:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                cached = json.load(f)
+            self.proxies = cached["proxies"]
+            self.fetched_at = cached["fetched_at"]
+            print(f"Loaded {len(self.proxies)} cached proxies from {self.cache_path}")
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Could not read proxy cache {self.cache_path}: {e}")
+
+    def _save_cache(self) -> None:
+        if not self.cache_path:
+            return
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp"
+        # The list may contain proxy credentials
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"fetched_at": self.fetched_at, "proxies": self.proxies}, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def is_fresh(self) -> bool:
+        return bool(self.proxies) and time.time() - self.fetched_at < self.ttl
+
+    def refresh(self) -> List[Dict]:
+        """Downloads the list now (blocking)."""
+        proxies = self.fetch(self._get_session())
+        with self.lock:
+            self.proxies = proxies
+            self.fetched_at = time.time()
+        try:
+            self._save_cache()
+        except OSError as e:
+            print(f"Could not write proxy cache {self.cache_path}: {e}")
+        return proxies
+
+    def _refresh_loop(self) -> None:
+        while True:
+            delay = max(self.fetched_at + self.ttl * 0.8 - time.time(), 1.0)
+            if self.stop_event.wait(delay):
+                return
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Background proxy refresh failed: {e}")
+                self.stop_event.wait(min(self.ttl / 10, 60))
+
+    def start(self) -> None:
+        """Starts the background refresh thread (once)."""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._refresh_loop, daemon=True)
+            self.thread.start()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+
+    def get(self) -> List[Dict]:
+        """
+        Current list; fetched synchronously only if nothing is cached.
+        A stale list (e.g. an old disk cache) is returned while the
+        background thread refreshes it.
+        """
+        if not self.proxies:
+            self.refresh()
+        self.start()
+        return self.proxies
+
+
+_providers: Dict[str, ProxyListProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_proxy_provider(key: str, fetch: Callable[..., List[Dict]]) -> ProxyListProvider:
+    """Returns the process-wide provider for key, creating it on first use."""
+    with _providers_lock:
+        if key not in _providers:
+            _providers[key] = ProxyListProvider(key, fetch)
+        return _providers[key]
+
+
+class WebshareProxyManager(ProxyCooldownMixin):
     """
     Simple proxy manager for Webshare.io:
     - Gets a list of proxies through the API.
     - Allows returning a random/next proxy.
+    The list comes from a shared ProxyListProvider, so creating a manager
+    per rotation doesn't download it again.
     """
 
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.headers = {"Authorization": f"Token {self.api_key}"}
-        self.proxies = []
         self.current_proxy_index = -1
-        self._fetch_proxies()
+        self.provider = get_proxy_provider(
+            f"webshare:{self.api_key}", self._fetch_proxies
+        )
+        self.cooldowns = self.provider.cooldowns
+        self.provider.get()
+
+    @property
+    def proxies(self) -> List[Dict]:
+        return self.provider.get()
 
-    def _fetch_proxies(self):
+    def _fetch_proxies(self, session) -> List[Dict]:
         url = (
             f"{BASE_URL}/proxy/list/"
             f"?mode=direct&page=1&page_size=25"
         )
-        response = requests.get(url, headers=self.headers)
+        response = session.get(url, headers=self.headers, timeout=30)
         if response.status_code == 200:
             data = response.json()
-            self.proxies = data["results"]
-            print(f"Fetched {len(self.proxies)} proxies from Webshare.io")
+            proxies = data["results"]
+            print(f"Fetched {len(proxies)} proxies from Webshare.io")
+            return proxies
         else:
             raise Exception(f"Failed to fetch proxies: {response.text}")
 
     def get_current_proxy(self) -> Dict:
-
-        if not self.proxies:
-            self._fetch_proxies()
-
-        proxy_data = random.choice(self.proxies)
+        proxy_data = self._choose(self.proxies)
         return {
             "proxy_address": proxy_data["proxy_address"],
             "port": proxy_data["port"],
@@ -53,7 +215,7 @@ class WebshareProxyManager:
         return self.get_current_proxy()
 
 
-class ProxyscrapeJSONManager:
+class ProxyscrapeJSONManager(ProxyCooldownMixin):
     """
     A proxy manager for JSON responses from proxyscrape.com:
     """
@@ -69,11 +231,21 @@ class ProxyscrapeJSONManager:
         self.allowed_countries = allowed_countries
         self.required_status = required_status
         self.required_protocol = required_protocol
-        self.proxies = self._fetch_proxies()
+        self.provider = get_proxy_provider(
+            f"proxyscrape:{api_url}:{allowed_countries}:"
+            f"{required_status}:{required_protocol}",
+            self._fetch_proxies,
+        )
+        self.cooldowns = self.provider.cooldowns
+        self.provider.get()
 
-    def _fetch_proxies(self) -> List[Dict]:
+    @property
+    def proxies(self) -> List[Dict]:
+        return self.provider.get()
+
+    def _fetch_proxies(self, session) -> List[Dict]:
         print(f"Fetching proxy list from: {self.api_url}")
-        resp = requests.get(self.api_url, timeout=30)
+        resp = session.get(self.api_url, timeout=30)
         if resp.status_code != 200:
             raise Exception(
                 f"Failed to fetch proxies. Status={resp.status_code}, Body={resp.text}"
@@ -127,9 +299,7 @@ class ProxyscrapeJSONManager:
         return parsed_proxies
 
     def get_current_proxy(self) -> Dict:
-        if not self.proxies:
-            self.proxies = self._fetch_proxies()
-        return random.choice(self.proxies)
+        return self._choose(self.proxies)
 
     def rotate_proxy(self) -> Dict:
         return self.get_current_proxy()
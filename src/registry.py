@@ -0,0 +1,57 @@
+# registry.py
+import importlib
+from typing import Any, Dict, List, Optional
+
+# kind -> name -> "module:attribute".
+# Targets are imported only when resolved, so choosing the CSV reader does not
+# import gspread and choosing an engine does not import the proxy providers.
+_REGISTRY: Dict[str, Dict[str, str]] = {
+    "engine": {
+        "google": "search_engines:GoogleSearchEngine",
+        "bing": "search_engines:BingSearchEngine",
+        "duckduckgo": "search_engines:DuckDuckGoSearchEngine",
+    },
+    "proxy": {
+        "webshare": "proxy_helper:WebshareProxyManager",
+        "proxyscrape": "proxy_helper:ProxyscrapeJSONManager",
+    },
+    "reader": {
+        "csv": "sheets_helper:read_profiles_csv",
+        "gsheet": "sheets_helper:read_profiles_gsheet",
+    },
+}
+
+_cache: Dict[str, Any] = {}
+
+
+def register(kind: str, name: str, target: str) -> None:
+    """Registers "module:attribute" under kind/name (overrides existing)."""
+    if ":" not in target:
+        raise ValueError(f"Target must look like 'module:attribute', got {target}")
+    _REGISTRY.setdefault(kind, {})[name.lower()] = target
+    _cache.pop(target, None)
+
+
+def names(kind: str) -> List[str]:
+    return list(_REGISTRY.get(kind, {}))
+
+
+def resolve(kind: str, name: str, default: Optional[str] = None) -> Any:
+    """
+    Imports and returns the object registered under kind/name.
+    Unknown names fall back to default (with a warning) if it is given.
+    """
+    entries = _REGISTRY.get(kind, {})
+    key = name.lower()
+    if key not in entries:
+        if default is None:
+            raise ValueError(
+                f"Unknown {kind} '{name}'. Available: {', '.join(entries)}"
+            )
+        print(f"[WARNING] Unknown {kind} '{name}', defaulting to {default}.")
+        key = default
+    target = entries[key]
+    if target not in _cache:
+        module_name, attr = target.split(":", 1)
+        _cache[target] = getattr(importlib.import_module(module_name), attr)
+    return _cache[target]
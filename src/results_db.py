@@ -0,0 +1,190 @@
+# results_db.py
+import csv
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from url_utils import canonical_url
+
+# CSV column -> database column
+COLUMNS = {
+    "Original": "original",
+    "LinkedInURL": "linkedin_url",
+    "FullName": "full_name",
+    "Location": "location",
+    "IPChange": "ip_change",
+}
+
+
+def result_status(result: Dict[str, Any]) -> str:
+    """Status of a result row: "ok" or the IPChange marker."""
+    return result.get("IPChange") or "ok"
+
+
+class ResultsDatabase:
+    """
+    Indexed result store (SQLite) with upsert semantics.
+    One row per canonical Original: reruns update the row instead of
+    appending a duplicate. Indexed by LinkedIn URL, status and update time.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                original TEXT NOT NULL,
+                linkedin_url TEXT NOT NULL DEFAULT '',
+                linkedin_key TEXT NOT NULL DEFAULT '',
+                full_name TEXT NOT NULL DEFAULT '',
+                location TEXT NOT NULL DEFAULT '',
+                ip_change TEXT NOT NULL DEFAULT '',
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 1,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_results_linkedin
+                ON results (linkedin_key);
+            CREATE INDEX IF NOT EXISTS idx_results_status
+                ON results (status, updated_at);
+            CREATE INDEX IF NOT EXISTS idx_results_updated
+                ON results (updated_at);
+            """
+        )
+        self.conn.commit()
+
+    def upsert_many(self, results: Iterable[Dict[str, Any]]) -> None:
+        """
+        Inserts or updates results. Status and IPChange always reflect the
+        latest attempt; previously found URL/name/location are kept when
+        the latest attempt returned nothing (authwall, captcha).
+        """
+        now = time.time()
+        rows = [
+            (
+                canonical_url(r["Original"]),
+                r["Original"],
+                r.get("LinkedInURL") or "",
+                canonical_url(r.get("LinkedInURL") or ""),
+                r.get("FullName") or "",
+                r.get("Location") or "",
+                r.get("IPChange") or "",
+                result_status(r),
+                now,
+            )
+            for r in results
+        ]
+        self.conn.executemany(
+            """
+            INSERT INTO results (key, original, linkedin_url, linkedin_key,
+                                 full_name, location, ip_change, status, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (key) DO UPDATE SET
+                original = excluded.original,
+                linkedin_url = COALESCE(NULLIF(excluded.linkedin_url, ''),
+                                        results.linkedin_url),
+                linkedin_key = COALESCE(NULLIF(excluded.linkedin_key, ''),
+                                        results.linkedin_key),
+                full_name = COALESCE(NULLIF(excluded.full_name, ''),
+                                     results.full_name),
+                location = COALESCE(NULLIF(excluded.location, ''),
+                                    results.location),
+                ip_change = excluded.ip_change,
+                status = excluded.status,
+                attempts = results.attempts + 1,
+                updated_at = excluded.updated_at
+            """,
+            rows,
+        )
+        self.conn.commit()
+
+    def upsert(self, result: Dict[str, Any]) -> None:
+        self.upsert_many([result])
+
+    def _rows(self, where: str = "", params: tuple = ()) -> List[Dict[str, Any]]:
+        cur = self.conn.execute(
+            f"SELECT {', '.join(COLUMNS.values())} FROM results {where}", params
+        )
+        return [dict(zip(COLUMNS.keys(), row)) for row in cur.fetchall()]
+
+    def get(self, original: str) -> Optional[Dict[str, Any]]:
+        rows = self._rows("WHERE key = ?", (canonical_url(original),))
+        return rows[0] if rows else None
+
+    def find_by_linkedin_url(self, url: str) -> List[Dict[str, Any]]:
+        return self._rows("WHERE linkedin_key = ?", (canonical_url(url),))
+
+    def by_status(
+        self, status: str, limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Rows with the given status ("ok", "authwall", ...), newest first."""
+        where = "WHERE status = ? ORDER BY updated_at DESC"
+        params: tuple = (status,)
+        if limit is not None:
+            where += " LIMIT ?"
+            params += (limit,)
+        return self._rows(where, params)
+
+    def status_counts(self) -> Dict[str, int]:
+        cur = self.conn.execute("SELECT status, COUNT(*) FROM results GROUP BY status")
+        return dict(cur.fetchall())
+
+    def export_csv(self, path: str) -> int:
+        """Writes all rows with the linkedin_results.csv columns."""
+        cur = self.conn.execute(
+            f"SELECT {', '.join(COLUMNS.values())} FROM results ORDER BY updated_at"
+        )
+        count = 0
+        with open(path, "w", newline="", encoding="utf-8") as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(COLUMNS.keys())
+            for row in cur:
+                writer.writerow(row)
+                count += 1
+        return count
+
+    def export_parquet(self, path: str) -> int:
+        """Writes all rows to Parquet (needs pandas + pyarrow)."""
+        import pandas as pd
+
+        df = pd.read_sql_query(
+            f"SELECT {', '.join(COLUMNS.values())}, status, updated_at "
+            "FROM results ORDER BY updated_at",
+            self.conn,
+        )
+        df = df.rename(columns={v: k for k, v in COLUMNS.items()})
+        df.to_parquet(path, index=False)
+        return len(df)
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Query/export the results DB.")
+    arg_parser.add_argument("db", help="Path to the results database")
+    sub = arg_parser.add_subparsers(dest="command", required=True)
+    export_cmd = sub.add_parser("export", help="Export to .csv or .parquet")
+    export_cmd.add_argument("output")
+    status_cmd = sub.add_parser("status", help="List rows with a status")
+    status_cmd.add_argument("status", nargs="?")
+    args = arg_parser.parse_args()
+
+    db = ResultsDatabase(args.db)
+    if args.command == "export":
+        if args.output.endswith(".parquet"):
+            n = db.export_parquet(args.output)
+        else:
+            n = db.export_csv(args.output)
+        print(f"Exported {n} row(s) to {args.output}")
+    elif args.status:
+        for row in db.by_status(args.status):
+            print(row["Original"], row["LinkedInURL"])
+    else:
+        print(db.status_counts())
+    db.close()
@@ -2,27 +2,89 @@
 import time
 import random
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import List, Optional, Tuple
 import urllib.parse
 
-from selenium.webdriver.remote.webdriver import WebDriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
 from selenium.common.exceptions import NoSuchElementException
 
+from browser import BY_CSS_SELECTOR, BY_ID, BY_NAME, KEY_ENTER, BrowserHandle
+from captcha_queue import CaptchaDetected
+from profile_cache import has_consent, mark_consent
+from selector_registry import get_selector_registry
+
+
+def is_linkedin_profile_url(href: str) -> bool:
+    return "linkedin.com/in/" in href
+
+
 ################################################
-# Example simplified integration of 2captcha
+# Captcha handling
 ################################################
 
 
+def find_recaptcha_site_key(driver: BrowserHandle) -> Optional[str]:
+    try:
+        element = driver.find_element(BY_CSS_SELECTOR, "[data-sitekey]")
+        return element.get_attribute("data-sitekey")
+    except NoSuchElementException:
+        return None
+
+
 def solve_recaptcha_2captcha(
     api_key: str, site_key: str, page_url: str, max_wait=120
 ) -> Optional[str]:
-    pass
-
+    """Solves a reCAPTCHA v2 through the 2captcha.com API, returns the token."""
+    import requests
+
+    resp = requests.post(
+        "https://2captcha.com/in.php",
+        data={
+            "key": api_key,
+            "method": "userrecaptcha",
+            "googlekey": site_key,
+            "pageurl": page_url,
+            "json": 1,
+        },
+        timeout=30,
+    ).json()
+    if resp.get("status") != 1:
+        print(f"2captcha rejected the task: {resp.get('request')}")
+        return None
 
-def inject_recaptcha_response(driver: WebDriver, recaptcha_response: str):
-    pass
+    task_id = resp["request"]
+    deadline = time.time() + max_wait
+    while time.time() < deadline:
+        time.sleep(5)
+        resp = requests.get(
+            "https://2captcha.com/res.php",
+            params={"key": api_key, "action": "get", "id": task_id, "json": 1},
+            timeout=30,
+        ).json()
+        if resp.get("status") == 1:
+            return resp["request"]
+        if resp.get("request") != "CAPCHA_NOT_READY":
+            print(f"2captcha error: {resp.get('request')}")
+            return None
+
+    print("2captcha did not solve the captcha in time.")
+    return None
+
+
+def inject_recaptcha_response(driver: BrowserHandle, recaptcha_response: str):
+    """Puts the token into g-recaptcha-response and submits its form."""
+    driver.execute_script(
+        """
+        const token = arguments[0];
+        document.querySelectorAll('[name="g-recaptcha-response"]').forEach(el => {
+            el.style.display = 'block';
+            el.value = token;
+            el.innerHTML = token;
+        });
+        const el = document.querySelector('[name="g-recaptcha-response"]');
+        if (el && el.form) { el.form.submit(); }
+        """,
+        recaptcha_response,
+    )
 
 
 ################################################
@@ -35,32 +97,58 @@ class BaseSearchEngine(ABC):
     Base class for all search engines.
     """
 
+    name = "base"
+    # True if batch_search_linkedin_results is implemented
+    supports_batch = False
+
     @abstractmethod
-    def open_homepage(self, driver: WebDriver) -> None:
+    def open_homepage(self, driver: BrowserHandle) -> None:
         """Opens the main page of the search engine."""
         pass
 
     @abstractmethod
-    def accept_cookies(self, driver: WebDriver) -> None:
-        """Clicks "Accept cookies" if needed."""
+    def accept_cookies(self, driver: BrowserHandle) -> bool:
+        """Clicks "Accept cookies" if shown. Returns True if it clicked."""
         pass
 
     @abstractmethod
-    def check_for_captcha(self, driver: WebDriver) -> bool:
+    def check_for_captcha(self, driver: BrowserHandle) -> bool:
         pass
 
     @abstractmethod
-    def perform_search(self, driver: WebDriver, query: str) -> None:
+    def perform_search(self, driver: BrowserHandle, query: str) -> None:
         pass
 
     @abstractmethod
-    def extract_linkedin_url(self, driver: WebDriver) -> Optional[str]:
+    def extract_linkedin_url(self, driver: BrowserHandle) -> Optional[str]:
         pass
 
-    def search_linkedin_profile(self, driver: WebDriver, query: str) -> Optional[str]:
+    def handle_captcha(
+        self, driver: BrowserHandle, captcha_token: Optional[str]
+    ) -> None:
+        """
+        Submits a token from the solver if there is one,
+        otherwise raises CaptchaDetected without waiting for a human.
+        """
+        if not captcha_token:
+            raise CaptchaDetected(
+                self.name, driver.current_url, find_recaptcha_site_key(driver)
+            )
+        print("Captcha detected, submitting the solved token.")
+        inject_recaptcha_response(driver, captcha_token)
+        time.sleep(random.uniform(2, 4))
+        if self.check_for_captcha(driver):
+            raise CaptchaDetected(
+                self.name, driver.current_url, find_recaptcha_site_key(driver)
+            )
+
+    def search_linkedin_profile(
+        self, driver: BrowserHandle, query: str, captcha_token: Optional[str] = None
+    ) -> Optional[str]:
         """
         Universal method: opens the main page, if needed accepts cookies,
         checks/solves captcha, enters query, again captcha, extracts LinkedIn link.
+        A captcha that can't be solved with captcha_token raises CaptchaDetected.
         """
         max_retries = 3
         retry_count = 0
@@ -71,18 +159,18 @@ class BaseSearchEngine(ABC):
                 self.open_homepage(driver)
                 time.sleep(random.uniform(1.5, 3.0))
 
-                # Step 2: click cookies
-                self.accept_cookies(driver)
+                # Step 2: click cookies (once per persistent profile). The
+                # profile is marked only after a click: the dialog may not be
+                # rendered yet, or a "sorry" page shown instead.
+                profile_dir = getattr(driver, "profile_dir", None)
+                if not has_consent(profile_dir, self.name):
+                    if self.accept_cookies(driver):
+                        mark_consent(profile_dir, self.name)
 
                 # Step 3: check/solve captcha
                 if self.check_for_captcha(driver):
-                    print(
-                        "It seems there is a captcha."
-                        "Solve it manually or automatically."
-                    )
-                    input("Press Enter when ready to continue...")
-                    retry_count += 1
-                    continue
+                    self.handle_captcha(driver, captcha_token)
+                    captcha_token = None
 
                 # Step 4: enter query
                 self.perform_search(driver, query)
@@ -90,17 +178,15 @@ class BaseSearchEngine(ABC):
 
                 # Step 5: again captcha?
                 if self.check_for_captcha(driver):
-                    print(
-                        "Captcha after the request. Solve it manually or automatically."
-                    )
-                    input("Press Enter when you solved the captcha...")
-                    retry_count += 1
-                    continue
+                    self.handle_captcha(driver, captcha_token)
+                    captcha_token = None
 
                 # Step 6: extract the link
                 found_url = self.extract_linkedin_url(driver)
                 return found_url
 
+            except CaptchaDetected:
+                raise
             except Exception as e:
                 print(f"Error during search: {e}")
                 retry_count += 1
@@ -109,6 +195,16 @@ class BaseSearchEngine(ABC):
         print("Maximum number of search attempts exceeded.")
         return None
 
+    def batch_search_linkedin_results(
+        self, driver: BrowserHandle, queries: List[str]
+    ) -> Optional[List[Tuple[str, str]]]:
+        """
+        Searches several queries with one SERP load (see batch_search.py).
+        Returns (url, title) of every LinkedIn profile on the page,
+        or None if the engine can't batch. Raises CaptchaDetected on a captcha.
+        """
+        return None
+
 
 ################################################
 # Google
@@ -120,17 +216,20 @@ class GoogleSearchEngine(BaseSearchEngine):
     Implementation of BaseSearchEngine for Google.
     """
 
-    def open_homepage(self, driver: WebDriver) -> None:
+    name = "google"
+
+    def open_homepage(self, driver: BrowserHandle) -> None:
         driver.get("https://www.google.com")
 
-    def accept_cookies(self, driver: WebDriver) -> None:
+    def accept_cookies(self, driver: BrowserHandle) -> bool:
         try:
-            accept_button = driver.find_element(By.ID, "L2AGLb")
+            accept_button = driver.find_element(BY_ID, "L2AGLb")
             accept_button.click()
+            return True
         except NoSuchElementException:
-            pass
+            return False
 
-    def check_for_captcha(self, driver: WebDriver) -> bool:
+    def check_for_captcha(self, driver: BrowserHandle) -> bool:
 
         page_source = driver.page_source.lower()
         current_url = driver.current_url.lower()
@@ -147,20 +246,17 @@ class GoogleSearchEngine(BaseSearchEngine):
 
         return False
 
-    def perform_search(self, driver: WebDriver, query: str) -> None:
-        search_box = driver.find_element(By.NAME, "q")
+    def perform_search(self, driver: BrowserHandle, query: str) -> None:
+        search_box = driver.find_element(BY_NAME, "q")
         search_box.clear()
         search_box.send_keys(query)
         time.sleep(random.uniform(0.5, 1.5))
-        search_box.send_keys(Keys.ENTER)
-
-    def extract_linkedin_url(self, driver: WebDriver) -> Optional[str]:
-        results = driver.find_elements(By.CSS_SELECTOR, "div.g a")
-        for r in results:
-            href = r.get_attribute("href")
-            if href and "linkedin.com/in/" in href:
-                return href
-        return None
+        search_box.send_keys(KEY_ENTER)
+
+    def extract_linkedin_url(self, driver: BrowserHandle) -> Optional[str]:
+        return get_selector_registry().find_link(
+            driver, "google.result_link", is_linkedin_profile_url
+        )
 
 
 ################################################
@@ -169,17 +265,21 @@ class GoogleSearchEngine(BaseSearchEngine):
 
 
 class BingSearchEngine(BaseSearchEngine):
-    def open_homepage(self, driver: WebDriver) -> None:
+    name = "bing"
+    supports_batch = True
+
+    def open_homepage(self, driver: BrowserHandle) -> None:
         driver.get("https://www.bing.com")
 
-    def accept_cookies(self, driver: WebDriver) -> None:
+    def accept_cookies(self, driver: BrowserHandle) -> bool:
         try:
-            accept_btn = driver.find_element(By.ID, "bnp_btn_accept")
+            accept_btn = driver.find_element(BY_ID, "bnp_btn_accept")
             accept_btn.click()
+            return True
         except NoSuchElementException:
-            pass
+            return False
 
-    def check_for_captcha(self, driver: WebDriver) -> bool:
+    def check_for_captcha(self, driver: BrowserHandle) -> bool:
         page_source = driver.page_source.lower()
         if (
             "please verify you're not a robot" in page_source
@@ -188,7 +288,7 @@ class BingSearchEngine(BaseSearchEngine):
             return True
         return False
 
-    def perform_search(self, driver: WebDriver, query: str) -> None:
+    def perform_search(self, driver: BrowserHandle, query: str) -> None:
         query = query.strip()
         linkedin_query = f'"{query}" site:linkedin.com/in/'
         encoded_query = urllib.parse.quote_plus(linkedin_query)
@@ -196,13 +296,31 @@ class BingSearchEngine(BaseSearchEngine):
         driver.get(search_url)
         time.sleep(3)
 
-    def extract_linkedin_url(self, driver: WebDriver) -> Optional[str]:
-        links = driver.find_elements(By.CSS_SELECTOR, "li.b_algo h2 a")
-        for link in links:
+    def extract_linkedin_url(self, driver: BrowserHandle) -> Optional[str]:
+        return get_selector_registry().find_link(
+            driver, "bing.result_link", is_linkedin_profile_url
+        )
+
+    def batch_search_linkedin_results(
+        self, driver: BrowserHandle, queries: List[str]
+    ) -> Optional[List[Tuple[str, str]]]:
+        terms = " OR ".join(f'"{query.strip()}"' for query in queries)
+        linkedin_query = f"({terms}) site:linkedin.com/in/"
+        encoded_query = urllib.parse.quote_plus(linkedin_query)
+        driver.get(f"https://www.bing.com/search?q={encoded_query}&first=1&count=50")
+        time.sleep(3)
+
+        if self.check_for_captcha(driver):
+            raise CaptchaDetected(
+                self.name, driver.current_url, find_recaptcha_site_key(driver)
+            )
+
+        results = []
+        for link in driver.find_elements(BY_CSS_SELECTOR, "li.b_algo h2 a"):
             href = link.get_attribute("href")
-            if href and "linkedin.com/in/" in href:
-                return href
-        return None
+            if href and is_linkedin_profile_url(href):
+                results.append((href, link.text))
+        return results
 
 
 ################################################
@@ -211,50 +329,43 @@ class BingSearchEngine(BaseSearchEngine):
 
 
 class DuckDuckGoSearchEngine(BaseSearchEngine):
-    def open_homepage(self, driver: WebDriver) -> None:
+    name = "duckduckgo"
+
+    def open_homepage(self, driver: BrowserHandle) -> None:
         driver.get("https://duckduckgo.com/")
         time.sleep(2)
 
-    def accept_cookies(self, driver: WebDriver) -> None:
+    def accept_cookies(self, driver: BrowserHandle) -> bool:
         try:
             consent_button = driver.find_element(
-                By.CSS_SELECTOR, "button[data-testid='cookie-consent-button']"
+                BY_CSS_SELECTOR, "button[data-testid='cookie-consent-button']"
             )
             consent_button.click()
+            return True
         except NoSuchElementException:
-            pass
+            return False
 
-    def check_for_captcha(self, driver: WebDriver) -> bool:
+    def check_for_captcha(self, driver: BrowserHandle) -> bool:
         return False
 
-    def perform_search(self, driver: WebDriver, query: str) -> None:
+    def perform_search(self, driver: BrowserHandle, query: str) -> None:
         try:
             search_box = driver.find_element(
-                By.CSS_SELECTOR,
+                BY_CSS_SELECTOR,
                 "input[name='q'], #search_form_input_homepage, #searchbox_input",
             )
         except NoSuchElementException:
-            search_box = driver.find_element(By.CSS_SELECTOR, "#search_form_input")
+            search_box = driver.find_element(BY_CSS_SELECTOR, "#search_form_input")
 
         search_box.clear()
         search_box.send_keys(query)
         time.sleep(random.uniform(0.5, 1.5))
-        search_box.send_keys(Keys.ENTER)
-
-    def extract_linkedin_url(self, driver: WebDriver) -> Optional[str]:
-        selectors = [
-            "article a[data-testid='result-title-a']",
-            "a.result__a",
-            ".results a",
-        ]
+        search_box.send_keys(KEY_ENTER)
 
-        for selector in selectors:
-            results = driver.find_elements(By.CSS_SELECTOR, selector)
-            for link in results:
-                href = link.get_attribute("href")
-                if href and "linkedin.com/in/" in href:
-                    return href
-        return None
+    def extract_linkedin_url(self, driver: BrowserHandle) -> Optional[str]:
+        return get_selector_registry().find_link(
+            driver, "duckduckgo.result_link", is_linkedin_profile_url
+        )
 
 
 ################################################
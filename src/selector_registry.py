@@ -0,0 +1,160 @@
+# selector_registry.py
+import atexit
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from browser import BY_CSS_SELECTOR, BrowserHandle
+
+# field -> CSS selectors in declared (fallback) order
+SELECTORS: Dict[str, List[str]] = {
+    "profile.name": [
+        "h1.text-heading-xlarge",
+        "h1.top-card-layout__title",
+        ".pv-text-details__left-panel h1",
+        "h1",
+    ],
+    "profile.location": [
+        ".top-card-layout__card span.top-card__subline-item",
+        "span.location",
+        ".pv-text-details__left-panel div.text-body-small",
+        ".profile-info-subheader .not-first-middot span:first-child",
+    ],
+    "profile.position": [
+        ".experience-item__title",
+        ".top-card-layout__headline",
+        ".pv-text-details__left-panel div.text-body-medium.break-words",
+    ],
+    "google.result_link": ["div.g a"],
+    "bing.result_link": ["li.b_algo h2 a"],
+    "duckduckgo.result_link": [
+        "article a[data-testid='result-title-a']",
+        "a.result__a",
+        ".results a",
+    ],
+}
+
+
+class SelectorRegistry:
+    """
+    Declarative selectors with hit/miss/latency statistics.
+    Selectors of a field are tried in order of their historical hit rate
+    (then latency), so after markup changes the selector that works moves
+    to the front. Statistics are persisted as JSON between runs.
+    """
+
+    def __init__(
+        self,
+        selectors: Optional[Dict[str, List[str]]] = None,
+        stats_path: Optional[str] = None,
+    ):
+        self.selectors = selectors or SELECTORS
+        self.stats_path = stats_path
+        self.stats: Dict[str, Dict[str, Dict[str, float]]] = {}
+        self.lock = threading.Lock()
+        self.run_lookups: Dict[str, int] = {}
+        self.run_probes: Dict[str, int] = {}
+        if stats_path and os.path.exists(stats_path):
+            try:
+                with open(stats_path, encoding="utf-8") as f:
+                    self.stats = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Could not load selector stats from {stats_path}: {e}")
+
+    def _stat(self, field: str, selector: str) -> Dict[str, float]:
+        return self.stats.setdefault(field, {}).setdefault(
+            selector, {"hits": 0, "misses": 0, "seconds": 0.0}
+        )
+
+    def ordered(self, field: str) -> List[str]:
+        """Selectors of the field, historically best first."""
+
+        def score(selector: str):
+            stat = self.stats.get(field, {}).get(selector)
+            if not stat:
+                return (-0.5, 0.0)
+            probes = stat["hits"] + stat["misses"]
+            hit_rate = (stat["hits"] + 1) / (probes + 2)
+            latency = stat["seconds"] / probes if probes else 0.0
+            return (-hit_rate, latency)
+
+        # sorted() is stable: ties keep the declared order
+        return sorted(self.selectors[field], key=score)
+
+    def record(self, field: str, selector: str, hit: bool, seconds: float) -> None:
+        with self.lock:
+            stat = self._stat(field, selector)
+            stat["hits" if hit else "misses"] += 1
+            stat["seconds"] += seconds
+            self.run_probes[field] = self.run_probes.get(field, 0) + 1
+
+    def _count_lookup(self, field: str) -> None:
+        with self.lock:
+            self.run_lookups[field] = self.run_lookups.get(field, 0) + 1
+
+    def find_text(self, driver: BrowserHandle, field: str) -> Optional[str]:
+        """Text of the first selector of the field with non-empty text."""
+        from selenium.common.exceptions import NoSuchElementException
+
+        self._count_lookup(field)
+        for selector in self.ordered(field):
+            start = time.perf_counter()
+            try:
+                text = driver.find_element(BY_CSS_SELECTOR, selector).text.strip()
+            except NoSuchElementException:
+                text = ""
+            self.record(field, selector, bool(text), time.perf_counter() - start)
+            if text:
+                return text
+        return None
+
+    def find_link(
+        self, driver: BrowserHandle, field: str, accept: Callable[[str], bool]
+    ) -> Optional[str]:
+        """First href among the field's elements accepted by the predicate."""
+
+        self._count_lookup(field)
+        for selector in self.ordered(field):
+            start = time.perf_counter()
+            found = None
+            for element in driver.find_elements(BY_CSS_SELECTOR, selector):
+                href = element.get_attribute("href")
+                if href and accept(href):
+                    found = href
+                    break
+            self.record(field, selector, found is not None, time.perf_counter() - start)
+            if found:
+                return found
+        return None
+
+    def probes_per_field(self) -> Dict[str, float]:
+        """Average number of selectors tried per lookup in this run."""
+        return {
+            field: round(self.run_probes.get(field, 0) / lookups, 2)
+            for field, lookups in self.run_lookups.items()
+        }
+
+    def save(self) -> None:
+        if not self.stats_path:
+            return
+        with self.lock:
+            tmp_path = f"{self.stats_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.stats, f, indent=2)
+            os.replace(tmp_path, self.stats_path)
+
+
+_registry: Optional[SelectorRegistry] = None
+
+
+def get_selector_registry() -> SelectorRegistry:
+    """Shared registry; stats persisted to SELECTOR_STATS_PATH at exit."""
+    global _registry
+    if _registry is None:
+        _registry = SelectorRegistry(
+            stats_path=os.environ.get("SELECTOR_STATS_PATH", "selector_stats.json")
+        )
+        atexit.register(_registry.save)
+    return _registry
@@ -1,11 +1,24 @@
 # sheets_helper.py
-import pandas as pd
-from typing import List
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+import random
+import time
+from typing import Any, Dict, List, Sequence
+
+# pandas, gspread and oauth2client are imported inside the functions that
+# need them: a CSV-only run never loads the Google client libraries.
+
+SCOPE = [
+    "https://spreadsheets.google.com/feeds",
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+    "https://www.googleapis.com/auth/drive.file",
+]
+# Status codes worth retrying: quota exceeded and transient server errors
+RETRYABLE_STATUS = {429, 500, 502, 503}
 
 
 def read_profiles_csv(csv_path: str) -> List[str]:
+    import pandas as pd
+
     df = pd.read_csv(csv_path)
     if "prooflink" not in df.columns:
         raise ValueError("CSV must contain 'prooflink' column!")
@@ -13,20 +26,31 @@ def read_profiles_csv(csv_path: str) -> List[str]:
     return urls
 
 
-def read_profiles_gsheet(sheet_url: str, creds_file: str) -> List[str]:
-    if gspread is None or ServiceAccountCredentials is None:
+def open_spreadsheet(sheet_url: str, creds_file: str):
+    try:
+        import gspread
+        from oauth2client.service_account import ServiceAccountCredentials
+    except ImportError:
         raise ImportError("gspread / oauth2client is not installed or not available.")
 
-    scope = [
-        "https://spreadsheets.google.com/feeds",
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive",
-        "https://www.googleapis.com/auth/drive.file",
-    ]
-    creds = ServiceAccountCredentials.from_json_keyfile_name(creds_file, scope)
+    creds = ServiceAccountCredentials.from_json_keyfile_name(creds_file, SCOPE)
     client = gspread.authorize(creds)
+    return client.open_by_url(sheet_url)
+
 
-    sh = client.open_by_url(sheet_url)
+def open_worksheet(sheet_url: str, creds_file: str, title: str, cols: int = 26):
+    """Opens the worksheet with the given title, creating it if needed."""
+    import gspread
+
+    sh = open_spreadsheet(sheet_url, creds_file)
+    try:
+        return sh.worksheet(title)
+    except gspread.exceptions.WorksheetNotFound:
+        return sh.add_worksheet(title=title, rows=1000, cols=cols)
+
+
+def read_profiles_gsheet(sheet_url: str, creds_file: str) -> List[str]:
+    sh = open_spreadsheet(sheet_url, creds_file)
     worksheet = sh.sheet1
 
     data = worksheet.get_all_values()
@@ -45,3 +69,87 @@ def read_profiles_gsheet(sheet_url: str, creds_file: str) -> List[str]:
         if len(row) > col_index:
             prooflinks.append(row[col_index])
     return prooflinks
+
+
+def _is_retryable(error: Exception) -> bool:
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return "quota" in str(error).lower() or "rate limit" in str(error).lower()
+
+
+class BatchedSheetWriter:
+    """
+    Collects result rows and appends them to a worksheet with one call
+    every flush_rows rows or flush_interval seconds, instead of one API call
+    per row. Rows are appended by the server after the last row of the
+    table, so several writers (nodes, concurrent runs) can share a sheet.
+    Quota (429) and transient errors are retried with exponential backoff.
+    Works with any object that has the gspread Worksheet methods
+    row_values and append_rows.
+    """
+
+    def __init__(
+        self,
+        worksheet,
+        fieldnames: Sequence[str],
+        flush_rows: int = 50,
+        flush_interval: float = 30.0,
+        max_retries: int = 6,
+        backoff: float = 2.0,
+    ):
+        self.worksheet = worksheet
+        self.fieldnames = list(fieldnames)
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.pending: List[List[Any]] = []
+        self.last_flush = time.monotonic()
+
+        # Header of a new sheet, written at once to keep the window in
+        # which another writer could also see an empty sheet short
+        if not self._call(self.worksheet.row_values, 1):
+            self._append([self.fieldnames])
+
+    def _call(self, func, *args, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if attempt == self.max_retries or not _is_retryable(e):
+                    raise
+                delay = self.backoff * (2**attempt) + random.uniform(0, 1)
+                print(f"Sheets API error ({e}), retrying in {delay:.1f}s...")
+                time.sleep(delay)
+
+    def _append(self, rows: List[List[Any]]) -> None:
+        self._call(
+            self.worksheet.append_rows,
+            rows,
+            value_input_option="RAW",
+            table_range="A1",
+        )
+
+    def add(self, row: Dict[str, Any]) -> None:
+        self.pending.append([row.get(name, "") for name in self.fieldnames])
+        if (
+            len(self.pending) >= self.flush_rows
+            or time.monotonic() - self.last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self) -> int:
+        """Writes pending rows. Returns the number of rows written."""
+        self.last_flush = time.monotonic()
+        if not self.pending:
+            return 0
+
+        rows = self.pending
+        self._append(rows)
+        self.pending = []
+        return len(rows)
+
+    def close(self) -> None:
+        self.flush()
@@ -0,0 +1,108 @@
+# static_page.py
+import urllib.parse
+from typing import Any, Dict, List, Optional
+
+from browser import BY_CSS_SELECTOR, BY_ID, BY_NAME
+
+
+def _unsupported(operation: str):
+    raise RuntimeError(f"StaticPage doesn't support {operation}")
+
+
+class StaticElement:
+    """Element of a StaticPage (read-only)."""
+
+    def __init__(self, page: "StaticPage", tag):
+        self._page = page
+        self._tag = tag
+
+    @property
+    def text(self) -> str:
+        # Whitespace collapsed like WebElement.text
+        return " ".join(self._tag.get_text(" ").split())
+
+    def get_attribute(self, name: str) -> Optional[str]:
+        value = self._tag.get(name)
+        if isinstance(value, list):
+            value = " ".join(value)
+        if value is not None and name in ("href", "src"):
+            # WebElement returns resolved URLs
+            value = urllib.parse.urljoin(self._page.current_url, value)
+        return value
+
+    def click(self) -> None:
+        _unsupported("clicks")
+
+    def clear(self) -> None:
+        _unsupported("clearing inputs")
+
+    def send_keys(self, *value: str) -> None:
+        _unsupported("typing")
+
+
+class StaticPage:
+    """
+    BrowserHandle over saved HTML (e.g. from page_archive): the page is
+    "loaded" at url and parsed with BeautifulSoup, so the parser and the
+    search engines' extraction run without a browser. Supports id, name and
+    CSS locators; navigation and scripts are not available.
+    """
+
+    profile_dir = None
+
+    def __init__(self, html: str, url: str):
+        from bs4 import BeautifulSoup
+
+        try:
+            import lxml  # noqa: F401
+
+            features = "lxml"
+        except ImportError:
+            features = "html.parser"
+        self._html = html
+        self._url = url
+        self._soup = BeautifulSoup(html, features)
+
+    def get(self, url: str) -> None:
+        if url != self._url:
+            _unsupported(f"navigation (to {url})")
+
+    @property
+    def current_url(self) -> str:
+        return self._url
+
+    @property
+    def page_source(self) -> str:
+        return self._html
+
+    @property
+    def title(self) -> str:
+        return self._soup.title.get_text() if self._soup.title else ""
+
+    def find_elements(self, by: str, value: str) -> List[StaticElement]:
+        if by == BY_CSS_SELECTOR:
+            tags = self._soup.select(value)
+        elif by == BY_ID:
+            tags = self._soup.find_all(id=value)
+        elif by == BY_NAME:
+            tags = self._soup.find_all(attrs={"name": value})
+        else:
+            _unsupported(f"'{by}' locators")
+        return [StaticElement(self, tag) for tag in tags]
+
+    def find_element(self, by: str, value: str) -> StaticElement:
+        from selenium.common.exceptions import NoSuchElementException
+
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise NoSuchElementException(f"No element matches {by}={value}")
+        return elements[0]
+
+    def execute_script(self, script: str, *args) -> Any:
+        _unsupported("scripts")
+
+    def execute_cdp_cmd(self, cmd: str, cmd_args: Dict) -> Dict:
+        _unsupported("DevTools commands")
+
+    def quit(self) -> None:
+        pass
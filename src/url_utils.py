@@ -0,0 +1,81 @@
+# url_utils.py
+import re
+import urllib.parse
+from typing import Dict, List
+
+_URL_RE = re.compile(r"^(https?://)?([\w-]+\.)+[a-z]{2,}(/|$)", re.IGNORECASE)
+
+
+def looks_like_url(value: str) -> bool:
+    return bool(_URL_RE.match(value.strip()))
+
+
+def canonical_url(value: str) -> str:
+    """
+    Canonical form of an input row / profile URL used as a key:
+      - free text: collapsed whitespace, lower case,
+      - URL: no scheme, no "www."/country subdomain for LinkedIn,
+        no query/fragment, no trailing slash.
+    LinkedIn URLs are fully lower-cased (slugs are case-insensitive).
+    """
+    value = (value or "").strip()
+    if not value:
+        return ""
+    if not looks_like_url(value):
+        return " ".join(value.split()).lower()
+
+    if "://" not in value:
+        value = "https://" + value
+    parsed = urllib.parse.urlsplit(value)
+    host = parsed.netloc.lower().split("@")[-1].split(":")[0]
+    path = urllib.parse.unquote(parsed.path).rstrip("/")
+
+    if host == "linkedin.com" or host.endswith(".linkedin.com"):
+        return f"linkedin.com{path.lower()}"
+
+    if host.startswith("www."):
+        host = host[4:]
+    return f"{host}{path}"
+
+
+################################################
+# Input routing
+################################################
+
+# Routes of an input row
+ROUTE_LINKEDIN = "linkedin"  # already a profile URL: extract directly
+ROUTE_URL = "url"  # other URL: single search query
+ROUTE_NAME = "name"  # free text: search (batched if enabled)
+ROUTES = (ROUTE_LINKEDIN, ROUTE_URL, ROUTE_NAME)
+
+_LINKEDIN_RE = re.compile(
+    r"^(https?://)?([\w-]+\.)?linkedin\.com/in/[^/?#\s]", re.IGNORECASE
+)
+
+
+def classify_inputs(values: List[str]) -> List[str]:
+    """
+    Route (ROUTE_LINKEDIN, ROUTE_URL or ROUTE_NAME) of every input row.
+    Rows without a dot (most names) are routed without running a regex.
+    """
+    return [_classify_row(value) for value in values]
+
+
+def _classify_row(value: str) -> str:
+    value = value.strip()
+    # Names (the bulk of the inputs) rarely contain a dot
+    if "." not in value:
+        return ROUTE_NAME
+    if _LINKEDIN_RE.match(value):
+        return ROUTE_LINKEDIN
+    return ROUTE_URL if _URL_RE.match(value) else ROUTE_NAME
+
+
+def route_counts(routes: List[str]) -> Dict[str, int]:
+    return {route: routes.count(route) for route in ROUTES}
+
+
+def linkedin_profile_url(value: str) -> str:
+    """An input row of ROUTE_LINKEDIN as a URL the browser can open."""
+    value = value.strip()
+    return value if "://" in value else f"https://{value}"
@@ -0,0 +1,23 @@
+# test_authwall.py
+from authwall import AuthwallEstimator
+
+PROXY = {"proxy_address": "10.0.0.1", "port": 8080}
+
+
+def test_burned_after_two_authwalls_in_a_row():
+    estimator = AuthwallEstimator()
+    for _ in range(20):
+        estimator.record(PROXY, False, now=0)
+    estimator.record(PROXY, True, now=0)
+    assert not estimator.is_burned(PROXY, now=0)
+    estimator.record(PROXY, True, now=0)
+    assert estimator.is_burned(PROXY, now=0)
+
+
+def test_reset_forgets_a_rotated_proxy():
+    estimator = AuthwallEstimator()
+    estimator.record(PROXY, True, now=0)
+    estimator.record(PROXY, True, now=0)
+    estimator.reset(PROXY)
+    assert not estimator.is_burned(PROXY, now=0)
+    assert estimator.rate(PROXY, now=0) == 0.0
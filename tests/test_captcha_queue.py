@@ -0,0 +1,64 @@
+# test_captcha_queue.py
+import time
+
+from captcha_queue import CaptchaDetected, FakeCaptchaSolver, ParkedJobQueue
+
+
+def challenge(site_key="site-key"):
+    return CaptchaDetected("google", "https://www.google.com/sorry", site_key)
+
+
+def wait_ready(queue, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        ready = queue.pop_ready()
+        if ready:
+            return ready
+        time.sleep(0.01)
+    return []
+
+
+def test_parked_jobs_are_solved_concurrently():
+    solver = FakeCaptchaSolver(token="token", delay=0.3)
+    queue = ParkedJobQueue(solver=solver, cooldown=60, max_workers=4)
+    start = time.time()
+    for job in ("a", "b", "c", "d"):
+        assert queue.park(job, challenge())
+
+    ready = []
+    while len(ready) < 4 and time.time() - start < 5:
+        ready += wait_ready(queue)
+
+    # Four 0.3 s solves in parallel, well before the 60 s cooldown
+    assert sorted(ready) == [(job, "token") for job in ("a", "b", "c", "d")]
+    assert time.time() - start < 1.0
+    assert solver.calls == 4
+    assert queue.stats["solved"] == 4
+    queue.close()
+
+
+def test_unsolved_job_is_ready_after_cooldown():
+    queue = ParkedJobQueue(solver=FakeCaptchaSolver(token=None), cooldown=0.05)
+    assert queue.park("a", challenge())
+    assert wait_ready(queue) == [("a", None)]
+    queue.close()
+
+
+def test_parked_job_is_given_up_after_max_attempts():
+    queue = ParkedJobQueue(cooldown=0, max_attempts=2)
+    assert queue.park("a", challenge())
+    assert wait_ready(queue) == [("a", None)]
+    assert queue.park("a", challenge())
+    assert wait_ready(queue) == [("a", None)]
+    assert not queue.park("a", challenge())
+    assert queue.pending() == 0
+    assert queue.stats["given_up"] == 1
+
+
+def test_retrying_job_is_not_ready_twice():
+    queue = ParkedJobQueue(cooldown=0)
+    queue.park("a", challenge())
+    assert wait_ready(queue) == [("a", None)]
+    assert queue.pop_ready() == []
+    queue.forget("a")
+    assert queue.abandon() == []
@@ -0,0 +1,22 @@
+# test_job_queue.py
+import time
+
+from captcha_queue import CaptchaDetected, ParkedJobQueue
+from job_queue import SQLiteJobQueue
+
+
+def test_parked_jobs_keep_their_lease(tmp_path):
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.db"))
+    queue.enqueue(["https://www.linkedin.com/in/a", "Jane Doe"])
+    parked_job, other_job = queue.claim("worker", batch_size=2, lease_seconds=0.3)
+    parked = ParkedJobQueue(cooldown=60)
+    parked.park(parked_job, CaptchaDetected("google", "https://www.google.com/sorry"))
+
+    with queue.keep_alive(
+        "worker", lambda: [job.id for job in parked.jobs()], 0.3, interval=0.05
+    ):
+        time.sleep(0.6)
+        # Only the job that is not parked lost its lease
+        assert queue.reclaim_expired() == 1
+        assert queue.claim("other", batch_size=2, lease_seconds=60) == [other_job]
+    parked.close()
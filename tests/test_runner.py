@@ -0,0 +1,114 @@
+# test_runner.py
+import csv
+import os
+import random
+
+import pytest
+
+import main
+from authwall import AuthwallEstimator
+from bandwidth import BandwidthAccountant
+from captcha_queue import CaptchaDetected, ParkedJobQueue
+from hang_watchdog import HangWatchdog
+from job_queue import SQLiteJobQueue
+
+
+class FakeDriver:
+    profile_dir = None
+    current_url = "https://www.google.com/search"
+    page_source = "<html></html>"
+
+    def quit(self):
+        pass
+
+
+class FakeContextPool:
+    def __init__(self):
+        self.proxies = []
+
+    def new_context(self, proxy):
+        self.proxies.append(proxy)
+        return FakeDriver()
+
+    def close(self):
+        pass
+
+
+class FakeProxyManager:
+    def __init__(self):
+        self.rotations = 0
+        self.cooldowns = []
+
+    def rotate_proxy(self):
+        self.rotations += 1
+        return {"proxy_address": f"10.0.0.{self.rotations}", "port": 8080}
+
+    def cooldown(self, proxy, seconds):
+        self.cooldowns.append((proxy, seconds))
+
+
+class FakeEngine:
+    """Hits a captcha on the first search of every name, finds nothing after."""
+
+    name = "fake"
+    supports_batch = False
+
+    def __init__(self):
+        self.searches = []
+
+    def search_linkedin_profile(self, driver, query, captcha_token=None):
+        self.searches.append(query)
+        if self.searches.count(query) == 1:
+            raise CaptchaDetected(self.name, "https://www.google.com/sorry")
+        return None
+
+
+@pytest.fixture
+def runner(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "OUTPUT_FILE", str(tmp_path / "results.csv"))
+    monkeypatch.setattr(random, "uniform", lambda a, b: 0)
+    parked_jobs = ParkedJobQueue(cooldown=0)
+    runner = main.ProfileRunner(
+        FakeProxyManager(),
+        FakeEngine(),
+        BandwidthAccountant(),
+        parked_jobs,
+        AuthwallEstimator(),
+        HangWatchdog(60),
+        context_pool=FakeContextPool(),
+        job_queue=SQLiteJobQueue(str(tmp_path / "jobs.db")),
+        worker_id="worker",
+        captcha_cooldown=300,
+    )
+    runner.start()
+    yield runner
+    runner.close()
+
+
+def read_rows(runner):
+    with open(main.OUTPUT_FILE, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def test_captcha_parks_the_job_and_retries_it(runner):
+    runner.job_queue.enqueue(["Jane Doe"])
+    runner.run(runner.job_queue.iter_batches("worker", batch_size=10))
+
+    assert runner.search_engine.searches == ["Jane Doe", "Jane Doe"]
+    assert runner.proxy_manager.cooldowns == [(None, 300)]
+    assert runner.context_pool.proxies[-1] == runner.current_proxy
+    rows = read_rows(runner)
+    assert [(row["Original"], row["IPChange"]) for row in rows] == [
+        ("Jane Doe", "not_found_or_captcha")
+    ]
+    assert runner.job_queue.counts()["done"] == 1
+
+
+def test_result_of_a_job_completed_elsewhere_is_dropped(runner):
+    runner.job_queue.enqueue(["Jane Doe"])
+    (job,) = runner.job_queue.claim("worker", batch_size=1, lease_seconds=60)
+    result = main.empty_result(job.profile, "not_found_or_captcha")
+    assert runner.job_queue.complete(job.id, "other", result)
+
+    runner.record_result(job, result)
+    assert not os.path.exists(main.OUTPUT_FILE)